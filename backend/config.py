@@ -7,13 +7,129 @@ DB_NAME = os.getenv("DB_NAME", "mini_competition_db")
 DB_USER = os.getenv("DB_USER", "postgres")
 DB_PASSWORD = os.getenv("DB_PASSWORD", "postgres")
 
+# Database connection pool configuration
+DB_POOL_MIN_SIZE = int(os.getenv("DB_POOL_MIN_SIZE", "1"))
+DB_POOL_MAX_SIZE = int(os.getenv("DB_POOL_MAX_SIZE", "20"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))
+
 # Judge service configuration
 JUDGE_HOST = os.getenv("JUDGE_HOST", "localhost")
 JUDGE_PORT = os.getenv("JUDGE_PORT", "3000")
+# Shared judge HTTP client: timeouts in seconds, retries apply to GETs only
+JUDGE_CONNECT_TIMEOUT = float(os.getenv("JUDGE_CONNECT_TIMEOUT", "3"))
+JUDGE_READ_TIMEOUT = float(os.getenv("JUDGE_READ_TIMEOUT", "30"))
+JUDGE_GET_RETRIES = int(os.getenv("JUDGE_GET_RETRIES", "2"))
+JUDGE_POOL_SIZE = int(os.getenv("JUDGE_POOL_SIZE", "20"))
+# Judge nodes are health-checked every JUDGE_HEALTH_INTERVAL seconds with a
+# JUDGE_HEALTH_METHOD request of JUDGE_HEALTH_PATH; the default HEAD skips the
+# problem list body. A node's circuit breaker opens after JUDGE_EJECT_AFTER
+# consecutive failures and lets a trial request through
+# JUDGE_BREAKER_COOLDOWN seconds later (or closes on a passing health check)
+JUDGE_HEALTH_PATH = os.getenv("JUDGE_HEALTH_PATH", "/problems")
+JUDGE_HEALTH_METHOD = os.getenv("JUDGE_HEALTH_METHOD", "HEAD").upper()
+JUDGE_HEALTH_INTERVAL = float(os.getenv("JUDGE_HEALTH_INTERVAL", "5"))
+JUDGE_HEALTH_TIMEOUT = float(os.getenv("JUDGE_HEALTH_TIMEOUT", "2"))
+JUDGE_EJECT_AFTER = int(os.getenv("JUDGE_EJECT_AFTER", "3"))
+JUDGE_BREAKER_COOLDOWN = float(os.getenv("JUDGE_BREAKER_COOLDOWN", "15"))
+# URL the judge posts verdicts back to
+JUDGE_CALLBACK_URL = os.getenv(
+    "JUDGE_CALLBACK_URL", "http://backend:5000/submission/result"
+)
+
+# Judge dispatch queue configuration
+JUDGE_DISPATCH_WORKERS = int(os.getenv("JUDGE_DISPATCH_WORKERS", "4"))
+JUDGE_DISPATCH_MAX_ATTEMPTS = int(os.getenv("JUDGE_DISPATCH_MAX_ATTEMPTS", "5"))
+JUDGE_DISPATCH_BACKOFF = float(os.getenv("JUDGE_DISPATCH_BACKOFF", "2"))
+JUDGE_DISPATCH_MAX_BACKOFF = float(os.getenv("JUDGE_DISPATCH_MAX_BACKOFF", "60"))
+JUDGE_DISPATCH_POLL_INTERVAL = float(os.getenv("JUDGE_DISPATCH_POLL_INTERVAL", "1"))
+# Seconds a claimed submission is leased to the worker sending it; must
+# outlast a send, after which another worker may pick the submission up
+JUDGE_DISPATCH_LEASE = float(
+    os.getenv(
+        "JUDGE_DISPATCH_LEASE", str(2 * (JUDGE_CONNECT_TIMEOUT + JUDGE_READ_TIMEOUT))
+    )
+)
+# Share of dispatches per queue lane, as "lane:weight" pairs; submissions to a
+# running contest the user is registered for go to the contest lane
+JUDGE_DISPATCH_LANE_WEIGHTS = {
+    lane.strip(): int(weight)
+    for lane, weight in (
+        pair.split(":")
+        for pair in os.getenv(
+            "JUDGE_DISPATCH_LANE_WEIGHTS", "contest:4,practice:1"
+        ).split(",")
+    )
+}
+
+# Seconds the cached judge problem list is fresh, and seconds between reload
+# attempts while the judge is unreachable (the stale list is served meanwhile)
+PROBLEM_CATALOGUE_TTL = float(os.getenv("PROBLEM_CATALOGUE_TTL", "300"))
+PROBLEM_CATALOGUE_RETRY = float(os.getenv("PROBLEM_CATALOGUE_RETRY", "10"))
+# Directory of the on-disk statement PDF cache and seconds before a cached
+# statement is fetched again from the judge
+STATEMENT_CACHE_DIR = os.getenv(
+    "STATEMENT_CACHE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "tmp", "statements"),
+)
+STATEMENT_CACHE_TTL = float(os.getenv("STATEMENT_CACHE_TTL", "600"))
+# Seconds before a contest starts that this process warms its caches for it,
+# and seconds between checks for contests to warm (keep below the lead)
+CONTEST_WARMUP_LEAD = float(os.getenv("CONTEST_WARMUP_LEAD", "120"))
+CONTEST_WARMUP_POLL_INTERVAL = float(os.getenv("CONTEST_WARMUP_POLL_INTERVAL", "30"))
+# Let the front web server send cached files (needs X-Sendfile support there)
+USE_X_SENDFILE = os.getenv("USE_X_SENDFILE", "false").lower() in ("1", "true")
+
+# Submission upload limits in bytes; MAX_SUBMISSION_SIZE bounds the whole
+# multipart request and should stay below Werkzeug's 500KB in-memory spool
+MAX_SOURCE_SIZE = int(os.getenv("MAX_SOURCE_SIZE", str(64 * 1024)))
+MAX_SUBMISSION_SIZE = int(
+    os.getenv("MAX_SUBMISSION_SIZE", str(MAX_SOURCE_SIZE + 16 * 1024))
+)
+# Per-user submission token buckets: "local" (single process) or "postgres"
+# (shared by several backend processes). A bucket holds SUBMISSION_RATE_BURST
+# submissions and refills SUBMISSION_RATE_PER_MINUTE a minute; contests can
+# override both. SUBMISSION_MAX_IN_PROGRESS (0 = off) refuses submissions while
+# that many are waiting for a verdict
+SUBMISSION_RATE_LIMIT_BACKEND = os.getenv("SUBMISSION_RATE_LIMIT_BACKEND", "local")
+SUBMISSION_RATE_BURST = int(os.getenv("SUBMISSION_RATE_BURST", "10"))
+SUBMISSION_RATE_PER_MINUTE = float(os.getenv("SUBMISSION_RATE_PER_MINUTE", "6"))
+SUBMISSION_MAX_IN_PROGRESS = int(os.getenv("SUBMISSION_MAX_IN_PROGRESS", "0"))
+# Reuse the verdict of a byte-identical earlier submission (same problem
+# version and language, judged at most SUBMISSION_REUSE_MAX_AGE seconds ago)
+# instead of judging again; contests opt in with their reuse_verdicts flag
+SUBMISSION_REUSE_VERDICTS = os.getenv("SUBMISSION_REUSE_VERDICTS", "true").lower() in (
+    "1",
+    "true",
+)
+SUBMISSION_REUSE_MAX_AGE = float(os.getenv("SUBMISSION_REUSE_MAX_AGE", "86400"))
+
+# How waiting requests are woken: "local" (single process) or "postgres"
+# (LISTEN/NOTIFY, needed when several backend processes serve requests)
+NOTIFY_BACKEND = os.getenv("NOTIFY_BACKEND", "local")
+# Default and maximum seconds a verdict long-poll is held open
+STATUS_STREAM_TIMEOUT = float(os.getenv("STATUS_STREAM_TIMEOUT", "25"))
+STATUS_STREAM_MAX_TIMEOUT = float(os.getenv("STATUS_STREAM_MAX_TIMEOUT", "60"))
+# Number of (timestamp, timezone) renderings kept for API responses
+TIME_FORMAT_CACHE_SIZE = int(os.getenv("TIME_FORMAT_CACHE_SIZE", "4096"))
+# Largest page the paginated contest and submission lists return, and the
+# submission list's page size when the request gives no limit
+CONTESTS_PAGE_MAX_SIZE = int(os.getenv("CONTESTS_PAGE_MAX_SIZE", "100"))
+SUBMISSIONS_PAGE_MAX_SIZE = int(os.getenv("SUBMISSIONS_PAGE_MAX_SIZE", "100"))
+SUBMISSIONS_PAGE_SIZE = int(os.getenv("SUBMISSIONS_PAGE_SIZE", "50"))
+# Leaderboard deltas kept per contest for resuming streams, and seconds
+# between keep-alive comments on an idle stream
+LEADERBOARD_FEED_HISTORY = int(os.getenv("LEADERBOARD_FEED_HISTORY", "256"))
+LEADERBOARD_STREAM_KEEPALIVE = float(os.getenv("LEADERBOARD_STREAM_KEEPALIVE", "15"))
+# Seconds between rebuilds of the in-memory index of current contests, and
+# how long after a contest ended late judge callbacks are still routed by it
+ACTIVE_CONTEST_INDEX_REFRESH = float(os.getenv("ACTIVE_CONTEST_INDEX_REFRESH", "60"))
+ACTIVE_CONTEST_INDEX_GRACE = float(os.getenv("ACTIVE_CONTEST_INDEX_GRACE", "3600"))
 
 # JWT configuration
 JWT_SECRET = os.getenv("JWT_SECRET", "your-secret-key-change-this")
 JWT_EXPIRATION = int(os.getenv("JWT_EXPIRATION", "3600"))
+# Number of recently verified tokens kept in memory by the auth decorators
+TOKEN_CACHE_SIZE = int(os.getenv("TOKEN_CACHE_SIZE", "1024"))
 
 # Flask configuration
 FLASK_ENV = os.getenv("FLASK_ENV", "development")
@@ -24,3 +140,9 @@ DATABASE_URL = f"postgresql://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NA
 
 # Judge service URL
 JUDGE_BASE_URL = f"http://{JUDGE_HOST}:{JUDGE_PORT}"
+# Pool of judge nodes, as comma-separated base URLs; defaults to JUDGE_BASE_URL
+JUDGE_ENDPOINTS = [
+    url.strip().rstrip("/")
+    for url in os.getenv("JUDGE_ENDPOINTS", "").split(",")
+    if url.strip()
+] or [JUDGE_BASE_URL]
@@ -1,12 +1,24 @@
+import os
 from flask import Flask, jsonify
 from flask_cors import CORS
+from config import USE_X_SENDFILE
 from routes.submission import submission_bp
 from routes.general import general_bp
 from routes.auth import auth_bp
 from routes.contest import contest_bp
-from services.connection import get_connection
+from services.connection import get_connection, get_pool_stats, release_connection
+from services.contest_index import active_contest_index
+from services.contest_warmer import contest_warmer
+from services.dispatcher import judge_dispatcher
+from services.judge_client import judge_client
+from services.leaderboard_feed import leaderboard_feed
+from services.notifier import verdict_notifier
+from services.problem_catalogue import problem_catalogue
+from services.rate_limiter import submission_rate_limiter
+from services.statement_cache import statement_cache
 
 app = Flask(__name__)
+app.config["USE_X_SENDFILE"] = USE_X_SENDFILE
 CORS(
     app,
     origins=[
@@ -16,7 +28,13 @@ CORS(
     ],
     supports_credentials=True,
     allow_headers=["Content-Type", "Authorization"],
-    expose_headers=["Content-Type", "Authorization"],
+    expose_headers=[
+        "Content-Type",
+        "Authorization",
+        "ETag",
+        "Last-Modified",
+        "X-Next-Cursor",
+    ],
 )
 
 app.register_blueprint(submission_bp)
@@ -24,18 +42,55 @@ app.register_blueprint(general_bp)
 app.register_blueprint(auth_bp)
 app.register_blueprint(contest_bp)
 
+# Hand each request's pooled connection back once the request is done
+app.teardown_appcontext(release_connection)
+
+
+def start_background_workers():
+    """Start the background workers that serve this process"""
+    judge_client.start()
+    judge_dispatcher.start()
+    verdict_notifier.start()
+    leaderboard_feed.start()
+    active_contest_index.start()
+    problem_catalogue.start()
+    contest_warmer.start()
+
+
+# Under the debug reloader only the child process serves requests.
+# START_BACKGROUND_WORKERS=0 builds the app without them (e.g. for tests).
+if os.environ.get("START_BACKGROUND_WORKERS", "1") != "0" and (
+    __name__ != "__main__" or os.environ.get("WERKZEUG_RUN_MAIN") == "true"
+):
+    start_background_workers()
+
 
 @app.route("/healthcheck", methods=["GET"])
 def healthcheck():
     """Health check endpoint for Docker"""
     try:
         # Test database connection
-        conn = get_connection()
-        cursor = conn.cursor()
-        cursor.execute("SELECT 1")
-        cursor.close()
-        conn.close()
-        return jsonify({"status": "healthy", "database": "connected"}), 200
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+        return (
+            jsonify(
+                {
+                    "status": "healthy",
+                    "database": "connected",
+                    "db_pool": get_pool_stats(),
+                    "judge_dispatch": judge_dispatcher.stats(),
+                    "judge_client": judge_client.stats(),
+                    "submission_limiter": submission_rate_limiter.stats(),
+                    "active_contest_index": active_contest_index.stats(),
+                    "problem_catalogue": problem_catalogue.stats(),
+                    "statement_cache": statement_cache.stats(),
+                    "contest_warmer": contest_warmer.stats(),
+                }
+            ),
+            200,
+        )
     except Exception as e:
         return jsonify({"status": "unhealthy", "error": str(e)}), 503
 
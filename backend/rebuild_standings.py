@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Admin command to rebuild contest standings from scratch
+Recomputes contest_standings and contest_standing_cells from
+contest_submissions and checks them against the full leaderboard computation.
+
+Usage:
+  python rebuild_standings.py              # rebuild and check every contest
+  python rebuild_standings.py 3 7          # rebuild and check contests 3 and 7
+  python rebuild_standings.py --check 3    # only check contest 3
+"""
+
+import argparse
+import sys
+from services.connection import release_connection
+from services.contest import ContestService
+
+
+def get_contest_ids(contest_service):
+    """Get the ids of all contests"""
+    contest_service.cursor.execute("SELECT id FROM contests ORDER BY id")
+    return [row["id"] for row in contest_service.cursor.fetchall()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rebuild contest standings")
+    parser.add_argument("contest_ids", nargs="*", type=int, help="Contests to rebuild")
+    parser.add_argument(
+        "--check",
+        action="store_true",
+        help="Only compare the standings with a full recomputation",
+    )
+    args = parser.parse_args()
+
+    contest_service = ContestService()
+    contest_ids = args.contest_ids or get_contest_ids(contest_service)
+    failed = False
+
+    try:
+        for contest_id in contest_ids:
+            if not args.check:
+                contest_service.standings.rebuild(contest_id)
+                print(f"🔄 Rebuilt standings for contest {contest_id}")
+
+            mismatches = contest_service.check_standings(contest_id)
+            if mismatches is None:
+                print(f"❌ Contest {contest_id} not found")
+                failed = True
+            elif mismatches:
+                print(
+                    f"❌ Contest {contest_id}: standings differ for users {mismatches}"
+                )
+                failed = True
+            else:
+                print(f"✅ Contest {contest_id}: standings match full computation")
+    finally:
+        release_connection()
+
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,11 @@
-from flask import Blueprint, jsonify, request
-from services.contest import ContestService
+import hashlib
+from flask import Blueprint, Response, jsonify, request
+from config import CONTESTS_PAGE_MAX_SIZE, LEADERBOARD_STREAM_KEEPALIVE
+from services.connection import release_connection
+from services.contest import CONTEST_STATUS_FILTERS, ContestService
 from services.decorators import require_auth, require_admin
+from services.leaderboard_feed import leaderboard_feed
+from utils.timezones import get_zone
 
 contest_bp = Blueprint("contest", __name__)
 contest_service = ContestService()
@@ -8,19 +13,89 @@ contest_service = ContestService()
 # DELETE * FROM contests WHERE name='Contest 1'
 
 
+def _conditional_json(etag_parts, build):
+    """
+    Respond with 304 if the client already has the representation identified
+    by `etag_parts`, otherwise with the JSON returned by `build()`
+
+    `build` may also return a (body, headers) tuple.
+    """
+    etag = hashlib.sha1("|".join(str(part) for part in etag_parts).encode()).hexdigest()
+    if request.if_none_match.contains(etag):
+        response = Response(status=304)
+    else:
+        body = build()
+        headers = {}
+        if isinstance(body, tuple):
+            body, headers = body
+        response = jsonify(body)
+        response.headers.update(headers)
+    response.set_etag(etag)
+    # Let browsers keep the body but revalidate it on every request
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _time_format_args():
+    """
+    (timezone_name, compact) for rendering times in this request: the
+    `timezone` query parameter (default UTC, unknown names fall back to UTC)
+    and `compact=1` for epoch milliseconds instead of formatted times
+    """
+    timezone_name = str(get_zone(request.args.get("timezone", "UTC")))
+    compact = request.args.get("compact", "").lower() in ("1", "true")
+    return timezone_name, compact
+
+
 @contest_bp.route("/contests", methods=["GET"])
 @require_auth
 def get_contests():
-    """Get all contests"""
+    """
+    Get all contests, newest first
+
+    Optional query parameters: `status` (upcoming, active or ended) and
+    `limit`/`cursor` for keyset pagination. With `limit` the cursor of the
+    next page, if any, is returned in the X-Next-Cursor header.
+    """
     try:
         user_id = request.user_id  # Get user_id from the auth decorator
 
         # Get timezone from query parameter if provided
-        timezone_name = request.args.get("timezone", "UTC")
-        contest_service.set_timezone(timezone_name)
+        timezone_name, compact = _time_format_args()
 
-        result = contest_service.get_contests(user_id)
-        return jsonify(result), 200
+        status = request.args.get("status")
+        if status is not None and status not in CONTEST_STATUS_FILTERS:
+            return jsonify({"message": f"Invalid status: {status}"}), 400
+        limit = request.args.get("limit", type=int)
+        if limit is not None:
+            limit = max(1, min(limit, CONTESTS_PAGE_MAX_SIZE))
+        cursor = request.args.get("cursor")
+
+        def build():
+            contests, next_cursor = contest_service.get_contests(
+                user_id, status, limit, cursor, timezone_name, compact
+            )
+            return contests, {"X-Next-Cursor": next_cursor} if next_cursor else {}
+
+        version = contest_service.get_contests_version()
+        # A status filter's result changes as contests start and end
+        next_change = contest_service.get_next_status_change() if status else None
+        return _conditional_json(
+            (
+                "contests",
+                version,
+                next_change,
+                user_id,
+                timezone_name,
+                compact,
+                status,
+                limit,
+                cursor,
+            ),
+            build,
+        )
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
@@ -36,15 +111,39 @@ def create_contest():
         start_time = data.get("start_time")
         end_time = data.get("end_time")
         problems = data.get("problems", [])
+        submission_burst = data.get("submission_burst")
+        submission_rate_per_minute = data.get("submission_rate_per_minute")
+        reuse_verdicts = bool(data.get("reuse_verdicts", False))
 
         if not name or not start_time or not end_time:
             return (
                 jsonify({"message": "Name, start_time, and end_time are required"}),
                 400,
             )
+        try:
+            if submission_burst is not None:
+                submission_burst = int(submission_burst)
+            if submission_rate_per_minute is not None:
+                submission_rate_per_minute = float(submission_rate_per_minute)
+        except (TypeError, ValueError):
+            return jsonify({"message": "Invalid submission rate limit"}), 400
+        if (submission_burst is not None and submission_burst < 1) or (
+            submission_rate_per_minute is not None and submission_rate_per_minute <= 0
+        ):
+            return jsonify({"message": "Invalid submission rate limit"}), 400
 
+        timezone_name, compact = _time_format_args()
         result = contest_service.create_contest(
-            name, description, start_time, end_time, problems
+            name,
+            description,
+            start_time,
+            end_time,
+            problems,
+            timezone_name,
+            compact,
+            submission_burst=submission_burst,
+            submission_rate_per_minute=submission_rate_per_minute,
+            reuse_verdicts=reuse_verdicts,
         )
         return jsonify(result), 201
     except Exception as e:
@@ -66,21 +165,63 @@ def get_contest(contest_id):
 def get_contest_leaderboard(contest_id):
     """Get the leaderboard for a specific contest"""
     try:
-        result = contest_service.get_contest_leaderboard(contest_id)
-        if result is None:
+        version = contest_service.get_contest_version(contest_id)
+        if version is None:
             return jsonify({"message": "Contest not found"}), 404
-        return jsonify(result), 200
+        timezone_name, compact = _time_format_args()
+        return _conditional_json(
+            ("leaderboard", contest_id, version, timezone_name, compact),
+            lambda: contest_service.get_contest_leaderboard(
+                contest_id, timezone_name, compact
+            ),
+        )
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
 
+@contest_bp.route("/contest/<contest_id>/leaderboard/stream", methods=["GET"])
+@require_auth
+def stream_contest_leaderboard(contest_id):
+    """
+    Stream leaderboard changes as Server-Sent Events
+
+    Sends a "snapshot" event with the full leaderboard, then a "delta" event
+    with only the changed rows and cells for every change. Each event id is
+    its version; reconnecting clients pass the last one in the Last-Event-ID
+    header or the `since` query parameter to resume without a new snapshot.
+    """
+    try:
+        since = request.headers.get("Last-Event-ID") or request.args.get("since")
+        try:
+            since = int(since) if since is not None else None
+        except ValueError:
+            since = None
+
+        if leaderboard_feed.snapshot(contest_id) is None:
+            return jsonify({"message": "Contest not found"}), 404
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+    finally:
+        # The stream outlives the request context; don't hold a pool slot
+        release_connection()
+
+    return Response(
+        leaderboard_feed.stream(contest_id, since, LEADERBOARD_STREAM_KEEPALIVE),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @contest_bp.route("/contest/<contest_id>/submissions", methods=["GET"])
 @require_auth
 def get_user_contest_submissions(contest_id):
     """Get all submissions for the current user in a specific contest"""
     try:
         user_id = request.user_id
-        result = contest_service.get_user_contest_submissions(contest_id, user_id)
+        timezone_name, compact = _time_format_args()
+        result = contest_service.get_user_contest_submissions(
+            contest_id, user_id, timezone_name, compact
+        )
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
@@ -94,6 +235,8 @@ def register_for_contest(contest_id):
         user_id = request.user_id
         result = contest_service.register_for_contest(contest_id, user_id)
         if result["success"]:
+            # The new participant shows up on the board
+            leaderboard_feed.publish(contest_id)
             return jsonify(result), 201
         else:
             return jsonify(result), 400
@@ -120,8 +263,11 @@ def get_registration_status(contest_id):
     try:
         user_id = request.user_id
         is_registered = contest_service.check_user_registration(contest_id, user_id)
+        timezone_name, compact = _time_format_args()
         registration_data = (
-            contest_service.get_user_registration_data(contest_id, user_id)
+            contest_service.get_user_registration_data(
+                contest_id, user_id, timezone_name, compact
+            )
             if is_registered
             else None
         )
@@ -1,7 +1,7 @@
-from flask import Blueprint, request, jsonify, Response
+from flask import Blueprint, request, jsonify, send_file
 from models.solution import Solution
 from werkzeug.utils import secure_filename
-from services.decorators import require_auth
+from services.decorators import require_auth, require_admin
 from services.general import GeneralService
 import os
 import uuid
@@ -23,19 +23,36 @@ def get_problems():
         return jsonify({"message": str(e)}), 500
 
 
+@general_bp.route("/general/problems/invalidate", methods=["POST"])
+@require_admin
+def invalidate_problems():
+    """Drop the cached problem list so it is reloaded from the judge"""
+    try:
+        result = general_service.invalidate_problem_catalogue()
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 @general_bp.route("/general/problem/<problem_id>/statement", methods=["GET"])
 @require_auth
 def get_problem_statement(problem_id):
-    """Proxy to the judge server to get problem statement PDF"""
+    """Serve a problem statement PDF from the local statement cache"""
     try:
         result = general_service.get_problem_statement(problem_id)
 
-        # Stream the PDF response
-        return Response(
-            result["content"],
-            content_type=result["content_type"],
-            headers={"Content-Disposition": result["content_disposition"]},
+        # send_file answers If-None-Match/If-Modified-Since and Range requests
+        # and hands the file to the server (X-Sendfile or wsgi.file_wrapper)
+        response = send_file(
+            result["path"],
+            mimetype=result["content_type"],
+            etag=result["etag"],
+            last_modified=result["last_modified"],
+            conditional=True,
         )
+        response.headers["Content-Disposition"] = result["content_disposition"]
+        response.headers["Cache-Control"] = "private, no-cache"
+        return response
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
@@ -49,12 +66,3 @@ def get_problem_metadata(problem_id):
         return jsonify(result), 200
     except Exception as e:
         return jsonify({"message": str(e)}), 500
-
-
-@general_bp.route("/healthcheck", methods=["GET"])
-def healthcheck():
-    try:
-        result = general_service.health_check()
-        return jsonify(result), 200
-    except Exception as e:
-        return jsonify({"message": str(e)}), 500
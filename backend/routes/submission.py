@@ -2,14 +2,21 @@ from flask import Blueprint, request, jsonify
 from models.solution import Solution
 from werkzeug.utils import secure_filename
 from services.decorators import require_auth
+from services.rate_limiter import RateLimited
 from services.submission import SubmissionService
 import os
 import uuid
 import requests
 from datetime import datetime
 import time
-from utils.logger import log_submission, log_error, log_request
-from datetime import timezone as tz
+from utils.logger import log_submission, log_error, log_info, log_request
+from config import (
+    MAX_SUBMISSION_SIZE,
+    STATUS_STREAM_TIMEOUT,
+    STATUS_STREAM_MAX_TIMEOUT,
+    SUBMISSIONS_PAGE_MAX_SIZE,
+    SUBMISSIONS_PAGE_SIZE,
+)
 
 submission_bp = Blueprint("submission", __name__)
 submission_service = SubmissionService()
@@ -20,6 +27,14 @@ submission_service = SubmissionService()
 def submit_solution():
     """Submit a solution to a problem"""
     start_time = time.time()
+
+    # Reject oversized uploads from the declared length, before the multipart
+    # body is parsed; the per-request limit also caps the size of chunked
+    # uploads (which Werkzeug still spools to a temporary file)
+    if request.content_length and request.content_length > MAX_SUBMISSION_SIZE:
+        return jsonify({"message": "Submission is too large"}), 413
+    request.max_content_length = MAX_SUBMISSION_SIZE
+
     file = request.files.get("file")
     problem_id = request.form.get("problem_id")
     language = request.form.get("language")
@@ -40,6 +55,14 @@ def submit_solution():
         log_request("POST", "/submission/submit", result["status_code"], duration)
 
         return jsonify(result["data"]), result["status_code"]
+    except RateLimited as e:
+        log_submission(user_id, problem_id, "SUBMIT_LIMITED", str(e))
+        duration = int((time.time() - start_time) * 1000)
+        log_request("POST", "/submission/submit", e.status_code, duration)
+
+        response = jsonify({"message": str(e), "retry_after": e.retry_after})
+        response.headers["Retry-After"] = str(e.retry_after)
+        return response, e.status_code
     except Exception as e:
         # Log failed submission
         log_submission(user_id, problem_id, "SUBMIT_ERROR", str(e))
@@ -63,14 +86,74 @@ def get_submission_status(submission_id):
         return jsonify({"message": str(e)}), 500
 
 
+@submission_bp.route("/submission/status/<submission_id>/stream", methods=["GET"])
+@require_auth
+def stream_submission_status(submission_id):
+    """
+    Long-poll a submission's status: returns as soon as a verdict is recorded,
+    or with the current (in-progress) status after `timeout` seconds
+    """
+    try:
+        timeout = min(
+            request.args.get("timeout", STATUS_STREAM_TIMEOUT, type=float),
+            STATUS_STREAM_MAX_TIMEOUT,
+        )
+        result = submission_service.wait_for_verdict(submission_id, max(timeout, 0))
+        return jsonify(result["data"]), result["status_code"]
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
+@submission_bp.route("/submission/<submission_id>/detail", methods=["GET"])
+@require_auth
+def get_submission_detail(submission_id):
+    """Get the full judge response (per-test results) of a submission"""
+    try:
+        result = submission_service.get_submission_detail(
+            submission_id, request.user_id
+        )
+        if result is None:
+            return jsonify({"message": "Submission not found"}), 404
+        return jsonify(result), 200
+    except Exception as e:
+        return jsonify({"message": str(e)}), 500
+
+
 @submission_bp.route("/submission/all", methods=["GET"])
 @require_auth
 def get_user_submissions():
-    """Get all submissions for the current user"""
+    """
+    Get the current user's submissions, newest first
+
+    Optional query parameters: `problem_id`, `status` and `language` filters,
+    `limit` (default SUBMISSIONS_PAGE_SIZE) and `cursor` for keyset pagination
+    (the next page's cursor, if any, is returned in the X-Next-Cursor header)
+    and `judge_response=1` to include the full judge responses.
+    """
     try:
         user_id = request.user_id
-        result = submission_service.get_user_submissions(user_id)
-        return jsonify(result["data"]), result["status_code"]
+        limit = request.args.get("limit", SUBMISSIONS_PAGE_SIZE, type=int)
+        limit = max(1, min(limit, SUBMISSIONS_PAGE_MAX_SIZE))
+        include_judge_response = request.args.get("judge_response", "").lower() in (
+            "1",
+            "true",
+        )
+
+        submissions, next_cursor = submission_service.get_user_submissions(
+            user_id,
+            problem_id=request.args.get("problem_id"),
+            status=request.args.get("status"),
+            language=request.args.get("language"),
+            limit=limit,
+            cursor=request.args.get("cursor"),
+            include_judge_response=include_judge_response,
+        )
+        response = jsonify(submissions)
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return response, 200
+    except ValueError as e:
+        return jsonify({"message": str(e)}), 400
     except Exception as e:
         return jsonify({"message": str(e)}), 500
 
@@ -96,7 +179,7 @@ def receive_judge_result():
         if not submission_id or not problem_id or not status:
             return jsonify({"message": "Missing required fields"}), 400
 
-        # Update the submission with judge results
+        # Updates the submission and its contest standings in one transaction
         result = submission_service.update_submission_result(
             submission_id,
             problem_id,
@@ -105,137 +188,43 @@ def receive_judge_result():
             execution_time,
             memory_used,
         )
-
-        if result["status_code"] == 200:
-            print(f"✅ Submission {submission_id} updated successfully")
-
-            # Check for all active contests where the user is registered and the problem exists
-            print(f"🔍 Checking for active contests for problem {problem_id}...")
-
-            try:
-                # Get submission details first to get user_id
-                submission_details = submission_service.get_submission_details(
-                    submission_id
-                )
-
-                if not submission_details:
-                    print(
-                        f"❌ Could not get submission details for submission {submission_id}"
-                    )
-                    return (
-                        jsonify(
-                            {
-                                "message": "Submission processed but contest tracking failed"
-                            }
-                        ),
-                        200,
-                    )
-
-                user_id = submission_details["user_id"]
-                print(f"👤 User ID: {user_id}")
-
-                # Get all active contests for this user and problem
-                submission_time = submission_details["submission_time"]
-                contests = (
-                    submission_service.get_all_active_contests_for_user_and_problem(
-                        user_id, problem_id, submission_time
-                    )
-                )
-
-                if contests:
-                    print(
-                        f"🎯 Found {len(contests)} active contests for this submission"
-                    )
-
-                    # Determine if submission was accepted
-                    is_accepted = False
-                    score = 0
-                    penalty_time = 0
-
-                    if status in ["completed", "accepted"] and judge_response:
-                        # Check if all test cases passed
-                        summary = judge_response.get("summary", {})
-                        failed = summary.get("failed", 0)
-                        is_accepted = failed == 0
-
-                        if is_accepted:
-                            score = 100  # Standard score for accepted submissions
-                            print(f"✅ Submission accepted with score {score}")
-                        else:
-                            # Calculate penalty time (you can adjust this logic)
-                            penalty_time = 20  # 20 minutes penalty for wrong submission
-                            print(
-                                f"❌ Submission failed, penalty time: {penalty_time} minutes"
-                            )
-
-                    # Create contest submission entries for ALL matching contests
-                    print(
-                        f"📝 Creating contest submission entries for {len(contests)} contests..."
-                    )
-                    submission_time = submission_details["submission_time"]
-
-                    for contest in contests:
-                        print(
-                            f"   📋 Processing contest: {contest['name']} (ID: {contest['id']})"
-                        )
-
-                        contest_start = contest["start_time"]
-                        contest_end = contest["end_time"]
-
-                        if submission_time.tzinfo is None:
-                            submission_time_check = submission_time.replace(
-                                tzinfo=tz.utc
-                            )
-                        else:
-                            submission_time_check = submission_time
-
-                        if contest_start.tzinfo is None:
-                            contest_start = contest_start.replace(tzinfo=tz.utc)
-                        if contest_end.tzinfo is None:
-                            contest_end = contest_end.replace(tzinfo=tz.utc)
-
-                        # Only create contest submission if within contest time bounds
-                        if (
-                            submission_time_check < contest_start
-                            or submission_time_check >= contest_end
-                        ):
-                            print(
-                                f"   ⚠️  Skipping contest {contest['id']}: submission made outside contest time"
-                            )
-                            continue
-
-                        contest_submission_id = (
-                            submission_service.create_contest_submission(
-                                contest["id"],
-                                user_id,
-                                problem_id,
-                                submission_id,
-                                submission_time,
-                                is_accepted,
-                                score,
-                                penalty_time,
-                            )
-                        )
-
-                        if contest_submission_id:
-                            print(
-                                f"   ✅ Created contest submission {contest_submission_id} for contest {contest['id']}"
-                            )
-                        else:
-                            print(
-                                f"   ❌ Failed to create contest submission for contest {contest['id']}"
-                            )
-                else:
-                    print(
-                        f"ℹ️ Submission {submission_id} was not made for any active contests where user is registered"
-                    )
-            except Exception as e:
-                print(f"❌ Error processing contest submission logic: {e}")
-                # Don't fail the entire callback if contest logic fails
-                pass
+        print(f"✅ Submission {submission_id} updated successfully")
 
         return jsonify(result["data"]), result["status_code"]
 
     except Exception as e:
         print(f"Error processing judge callback: {e}")
         return jsonify({"message": str(e)}), 500
+
+
+@submission_bp.route("/submission/results", methods=["POST"])
+def receive_judge_results():
+    """
+    Receive a batch of results from the judge server
+
+    Takes a JSON array of objects shaped like /submission/result callbacks
+    and records them in one transaction.
+    """
+    try:
+        verdicts = request.get_json()
+        if not verdicts or not isinstance(verdicts, list):
+            return jsonify({"message": "Expected a list of results"}), 400
+
+        for verdict in verdicts:
+            if (
+                not isinstance(verdict, dict)
+                or not str(verdict.get("submission_id", "")).isdigit()
+                or not verdict.get("problem_id")
+                or not verdict.get("status")
+            ):
+                return jsonify({"message": "Missing required fields"}), 400
+
+        updated = submission_service.record_judge_results(verdicts)
+        log_info(f"Recorded {len(updated)} of {len(verdicts)} judge results")
+
+        missing = sorted({int(v["submission_id"]) for v in verdicts} - set(updated))
+        return jsonify({"updated": updated, "not_found": missing}), 200
+
+    except Exception as e:
+        log_error(f"Error processing judge callback batch: {e}")
+        return jsonify({"message": str(e)}), 500
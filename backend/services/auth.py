@@ -1,17 +1,67 @@
-import psycopg2
-import psycopg2.extras
 import bcrypt
 import os
 import jwt
 import datetime
+import threading
+import time
+from collections import OrderedDict
 from config import (
     JWT_SECRET,
     JWT_EXPIRATION,
+    TOKEN_CACHE_SIZE,
 )
-from services.connection import get_connection
+from services.connection import DatabaseService
 
 
-class AuthService:
+class TokenVerifier:
+    """
+    Stateless JWT verifier with a bounded LRU of recently verified tokens
+
+    Cached entries expire at the token's own `exp`, so a hit never extends
+    a token's lifetime. No database access is needed to verify a token.
+    """
+
+    def __init__(self, secret=JWT_SECRET, max_size=TOKEN_CACHE_SIZE):
+        self.secret = secret
+        self.max_size = max_size
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def verify(self, token):
+        """
+        Verify a JWT token and return its payload
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._cache.get(token)
+            if entry is not None:
+                payload, expires_at = entry
+                if expires_at > now:
+                    self._cache.move_to_end(token)
+                    return payload
+                del self._cache[token]
+
+        try:
+            payload = jwt.decode(token, self.secret, algorithms=["HS256"])
+        except jwt.ExpiredSignatureError:
+            raise Exception("Token has expired")
+        except jwt.InvalidTokenError:
+            raise Exception("Invalid token")
+
+        expires_at = payload.get("exp")
+        if expires_at is not None and self.max_size > 0:
+            with self._lock:
+                self._cache[token] = (payload, expires_at)
+                self._cache.move_to_end(token)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+        return payload
+
+
+token_verifier = TokenVerifier()
+
+
+class AuthService(DatabaseService):
     """
     Authentication service
     """
@@ -19,8 +69,6 @@ class AuthService:
     def __init__(self):
         self.JWT_SECRET = JWT_SECRET
         self.JWT_EXPIRATION = JWT_EXPIRATION
-        self.conn = get_connection()
-        self.cursor = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
 
     def hash_password(self, password):
         """
@@ -46,13 +94,7 @@ class AuthService:
         """
         Verify a JWT token
         """
-        try:
-            payload = jwt.decode(token, self.JWT_SECRET, algorithms=["HS256"])
-            return payload
-        except jwt.ExpiredSignatureError:
-            raise Exception("Token has expired")
-        except jwt.InvalidTokenError:
-            raise Exception("Invalid token")
+        return token_verifier.verify(token)
 
     def verify_password(self, password, hashed_password):
         """
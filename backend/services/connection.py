@@ -1,14 +1,197 @@
-import os
+import threading
+import time
+from contextlib import contextmanager
 import psycopg2
-from psycopg2 import extras
+from psycopg2 import extras, extensions, pool
+from config import (
+    DB_HOST,
+    DB_PORT,
+    DB_NAME,
+    DB_USER,
+    DB_PASSWORD,
+    DB_POOL_MIN_SIZE,
+    DB_POOL_MAX_SIZE,
+    DB_POOL_TIMEOUT,
+)
 
 
+class PoolTimeout(Exception):
+    """Raised when no pooled connection became free within the wait timeout"""
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded pool of PostgreSQL connections
+
+    Callers block (up to `timeout` seconds) when all `max_size` connections
+    are checked out, instead of failing immediately like psycopg2's pool.
+    """
+
+    def __init__(self, min_size, max_size, timeout):
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self._pool = pool.ThreadedConnectionPool(
+            min_size,
+            max_size,
+            host=DB_HOST,
+            port=DB_PORT,
+            database=DB_NAME,
+            user=DB_USER,
+            password=DB_PASSWORD,
+        )
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+        self._in_use = 0
+        self._checkouts = 0
+        self._timeouts = 0
+        self._total_wait = 0.0
+        self._max_wait = 0.0
+
+    def getconn(self):
+        """Check out a connection, waiting for a free slot if needed"""
+        started = time.monotonic()
+        if not self._slots.acquire(timeout=self.timeout):
+            with self._lock:
+                self._timeouts += 1
+            raise PoolTimeout(f"No database connection available after {self.timeout}s")
+        waited = time.monotonic() - started
+
+        try:
+            conn = self._pool.getconn()
+            if conn.closed:
+                # Server went away while the connection sat idle
+                self._pool.putconn(conn, close=True)
+                conn = self._pool.getconn()
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._in_use += 1
+            self._checkouts += 1
+            self._total_wait += waited
+            self._max_wait = max(self._max_wait, waited)
+        return conn
+
+    def putconn(self, conn):
+        """Return a connection to the pool, discarding any open transaction"""
+        try:
+            close = bool(conn.closed)
+            if not close:
+                status = conn.get_transaction_status()
+                if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+                    close = True
+                elif status != extensions.TRANSACTION_STATUS_IDLE:
+                    conn.rollback()
+            self._pool.putconn(conn, close=close)
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self._slots.release()
+
+    def stats(self):
+        """Snapshot of pool usage and wait-time metrics"""
+        with self._lock:
+            return {
+                "min_size": self.min_size,
+                "max_size": self.max_size,
+                "in_use": self._in_use,
+                "checkouts": self._checkouts,
+                "timeouts": self._timeouts,
+                "avg_wait_ms": (
+                    round(self._total_wait * 1000 / self._checkouts, 3)
+                    if self._checkouts
+                    else 0.0
+                ),
+                "max_wait_ms": round(self._max_wait * 1000, 3),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_local = threading.local()
+
+
+def get_pool():
+    """Get the process-wide connection pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ConnectionPool(
+                    DB_POOL_MIN_SIZE, DB_POOL_MAX_SIZE, DB_POOL_TIMEOUT
+                )
+    return _pool
+
+
+@contextmanager
 def get_connection():
-    """Get a connection to the database"""
-    return psycopg2.connect(
-        host=os.getenv("DB_HOST"),
-        port=os.getenv("DB_PORT"),
-        database=os.getenv("DB_NAME"),
-        user=os.getenv("DB_USER"),
-        password=os.getenv("DB_PASSWORD"),
-    )
+    """
+    Check out a pooled connection for the duration of a `with` block
+    """
+    db_pool = get_pool()
+    conn = db_pool.getconn()
+    try:
+        yield conn
+    finally:
+        db_pool.putconn(conn)
+
+
+def borrow_connection():
+    """
+    Get the connection bound to the current thread (request), checking one
+    out of the pool on first use. Returned by `release_connection`.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is None or conn.closed:
+        if conn is not None:
+            release_connection()
+        conn = get_pool().getconn()
+        _local.conn = conn
+        _local.cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+    return conn
+
+
+def borrow_cursor():
+    """Get the RealDictCursor of the connection bound to the current thread"""
+    borrow_connection()
+    return _local.cursor
+
+
+def release_connection(exception=None):
+    """Return the current thread's connection (if any) to the pool"""
+    conn = getattr(_local, "conn", None)
+    if conn is None:
+        return
+    _local.conn = None
+    cursor = getattr(_local, "cursor", None)
+    _local.cursor = None
+    try:
+        if cursor is not None and not cursor.closed:
+            cursor.close()
+    except psycopg2.Error:
+        pass
+    get_pool().putconn(conn)
+
+
+def get_pool_stats():
+    """Pool metrics for health output, or None if the pool was never used"""
+    return _pool.stats() if _pool is not None else None
+
+
+class DatabaseService:
+    """
+    Base class for services that talk to the database
+
+    `conn` and `cursor` resolve to the connection borrowed by the current
+    thread, so a service singleton can be shared between request threads.
+    """
+
+    @property
+    def conn(self):
+        return borrow_connection()
+
+    @property
+    def cursor(self):
+        return borrow_cursor()
@@ -1,99 +1,159 @@
-import os
-import psycopg2
-from psycopg2 import extras
 import requests
+from psycopg2 import extras
 import json
 from datetime import datetime, timezone
-import pytz
-from services.connection import get_connection
-
-
-class ContestService:
+from services.connection import DatabaseService
+from services.contest_index import active_contest_index
+from services.judge_client import judge_client
+from services.problem_catalogue import problem_catalogue
+from services.leaderboard import build_leaderboard, build_leaderboard_from_history
+from services.standings import StandingsService
+from utils.pagination import decode_cursor, encode_cursor
+from utils.timezones import to_local_time
+
+# WHERE conditions for the contest status filter of get_contests
+CONTEST_STATUS_FILTERS = {
+    "upcoming": "c.start_time > CURRENT_TIMESTAMP",
+    "active": "c.start_time <= CURRENT_TIMESTAMP AND c.end_time >= CURRENT_TIMESTAMP",
+    "ended": "c.end_time < CURRENT_TIMESTAMP",
+}
+
+
+class ContestService(DatabaseService):
     """
     Contest service
     """
 
     def __init__(self):
-        judge_host = os.getenv("JUDGE_HOST", "mini-judge")
-        judge_port = os.getenv("JUDGE_PORT", "3000")
-        self.judge_base_url = f"http://{judge_host}:{judge_port}"
-        # Initialize with UTC timezone by default
-        self.local_timezone = pytz.timezone("UTC")
-        self.conn = get_connection()
-        self.cursor = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-
-    def set_timezone(self, timezone_name):
-        """Set the timezone for time conversions"""
-        try:
-            self.local_timezone = pytz.timezone(timezone_name)
-        except pytz.exceptions.UnknownTimeZoneError:
-            # Fallback to UTC if invalid timezone
-            self.local_timezone = pytz.timezone("UTC")
+        self.judge = judge_client
+        self.catalogue = problem_catalogue
+        self.standings = StandingsService()
 
-    def convert_to_local_time(self, utc_time):
+    def convert_to_local_time(self, utc_time, timezone_name="UTC", compact=False):
         """Convert UTC time to local timezone with timezone info"""
-        if utc_time is None:
-            return None
-
-        # Ensure the time is timezone-aware (UTC)
-        if utc_time.tzinfo is None:
-            utc_time = utc_time.replace(tzinfo=timezone.utc)
-
-        # Convert to local timezone
-        local_time = utc_time.astimezone(self.local_timezone)
+        return to_local_time(utc_time, timezone_name, compact)
+
+    def get_contests(
+        self,
+        user_id=None,
+        status=None,
+        limit=None,
+        cursor=None,
+        timezone_name="UTC",
+        compact=False,
+    ):
+        """
+        Get contests, newest first, with optional solved problems count for a user
 
-        # Format with timezone abbreviation
-        timezone_abbr = local_time.strftime("%Z")
-        return {
-            "iso": local_time.isoformat(),
-            "formatted": local_time.strftime("%Y-%m-%d %H:%M:%S"),
-            "timezone": timezone_abbr,
-            "timezone_name": str(self.local_timezone),
-            "utc_iso": utc_time.isoformat(),  # Keep UTC for status calculations
-        }
+        Args:
+            user_id: adds each contest's `solved_problems` for this user
+            status: only "upcoming", "active" or "ended" contests
+            limit: page size; without it every matching contest is returned
+            cursor: `next_cursor` of the previous page
 
-    def get_contests(self, user_id=None):
-        """Get all contests with optional solved problems count for a user"""
-        self.cursor.execute(
-            """
-            SELECT id, name, description, start_time, end_time, problems, created_at
-            FROM contests
-            ORDER BY created_at DESC
+        Returns (contests, next_cursor); next_cursor is None on the last page.
         """
+        conditions = []
+        params = {"user_id": user_id}
+        if status is not None:
+            conditions.append(CONTEST_STATUS_FILTERS[status])
+        if cursor is not None:
+            params["cursor_time"], params["cursor_id"] = decode_cursor(cursor)
+            conditions.append("(c.created_at, c.id) < (%(cursor_time)s, %(cursor_id)s)")
+        if limit is not None:
+            # One extra row tells whether there is a next page
+            params["limit"] = limit + 1
+
+        # Solved counts come from the same grouped join; without a user the
+        # join matches nothing
+        self.cursor.execute(
+            f"""
+            SELECT c.id, c.name, c.description, c.start_time, c.end_time,
+                   c.problems, c.created_at,
+                   COUNT(DISTINCT cs.problem_id) as solved_count
+            FROM contests c
+            LEFT JOIN contest_submissions cs
+                ON cs.contest_id = c.id
+                AND cs.user_id = %(user_id)s
+                AND cs.is_accepted = TRUE
+            {"WHERE " + " AND ".join(conditions) if conditions else ""}
+            GROUP BY c.id
+            ORDER BY c.created_at DESC, c.id DESC
+            {"LIMIT %(limit)s" if limit is not None else ""}
+        """,
+            params,
         )
 
         contests = self.cursor.fetchall()
-        result = []
+        next_cursor = None
+        if limit is not None and len(contests) > limit:
+            contests = contests[:limit]
+            next_cursor = encode_cursor(contests[-1]["created_at"], contests[-1]["id"])
 
+        result = []
         for contest in contests:
             contest_data = {
                 "id": contest["id"],
                 "name": contest["name"],
                 "description": contest["description"],
-                "start_time": self.convert_to_local_time(contest["start_time"]),
-                "end_time": self.convert_to_local_time(contest["end_time"]),
+                "start_time": self.convert_to_local_time(
+                    contest["start_time"], timezone_name, compact
+                ),
+                "end_time": self.convert_to_local_time(
+                    contest["end_time"], timezone_name, compact
+                ),
                 "problems": contest["problems"],
-                "created_at": self.convert_to_local_time(contest["created_at"]),
+                "created_at": self.convert_to_local_time(
+                    contest["created_at"], timezone_name, compact
+                ),
             }
 
             # Count how many problems user solved DURING this contest
             if user_id:
-                self.cursor.execute(
-                    """
-                    SELECT COUNT(DISTINCT problem_id) as solved_count
-                    FROM contest_submissions
-                    WHERE contest_id = %s 
-                    AND user_id = %s 
-                    AND is_accepted = TRUE
-                    """,
-                    (contest["id"], user_id),
-                )
-                solved_result = self.cursor.fetchone()
-                contest_data["solved_problems"] = solved_result["solved_count"] or 0
+                contest_data["solved_problems"] = contest["solved_count"] or 0
 
             result.append(contest_data)
 
-        return result
+        return result, next_cursor
+
+    def get_contests_version(self):
+        """
+        Fingerprint of all contests; changes whenever any contest's version
+        does, or a contest is added or removed
+        """
+        self.cursor.execute(
+            """
+            SELECT COUNT(*) as count,
+                   COALESCE(SUM(version), 0) as versions,
+                   COALESCE(MAX(id), 0) as max_id
+            FROM contests
+        """
+        )
+        row = self.cursor.fetchone()
+        return f"{row['count']}-{row['versions']}-{row['max_id']}"
+
+    def get_next_status_change(self):
+        """
+        Earliest contest start or end still ahead, when contests next move
+        between upcoming, active and ended (None if there is none)
+        """
+        self.cursor.execute(
+            """
+            SELECT LEAST(
+                (SELECT MIN(start_time) FROM contests
+                 WHERE start_time > CURRENT_TIMESTAMP),
+                (SELECT MIN(end_time) FROM contests
+                 WHERE end_time >= CURRENT_TIMESTAMP)
+            ) as next_change
+        """
+        )
+        return self.cursor.fetchone()["next_change"]
+
+    def get_contest_version(self, contest_id):
+        """Get a contest's version, or None if it does not exist"""
+        self.cursor.execute("SELECT version FROM contests WHERE id = %s", (contest_id,))
+        row = self.cursor.fetchone()
+        return row["version"] if row else None
 
     def get_user_solved_problems_count(self, user_id):
         """Get count of all problems solved by user (across all submissions, not contest-specific)"""
@@ -112,8 +172,27 @@ class ContestService:
 
         return result
 
-    def create_contest(self, name, description, start_time, end_time, problems):
-        """Create a new contest"""
+    def create_contest(
+        self,
+        name,
+        description,
+        start_time,
+        end_time,
+        problems,
+        timezone_name="UTC",
+        compact=False,
+        submission_burst=None,
+        submission_rate_per_minute=None,
+        reuse_verdicts=False,
+    ):
+        """
+        Create a new contest
+
+        `submission_burst` and `submission_rate_per_minute` override the
+        default submission rate limits for its participants; with
+        `reuse_verdicts`, identical resubmissions get the earlier verdict
+        instead of being judged again (still counting as attempts).
+        """
         try:
             # Convert problems list to JSONB
             problems_json = json.dumps(problems)
@@ -133,29 +212,69 @@ class ContestService:
 
             self.cursor.execute(
                 """
-                INSERT INTO contests (name, description, start_time, end_time, problems)
-                VALUES (%s, %s, %s, %s, %s)
-                RETURNING id, name, description, start_time, end_time, problems, created_at
+                INSERT INTO contests (name, description, start_time, end_time, problems,
+                                      submission_burst, submission_rate_per_minute,
+                                      reuse_verdicts)
+                VALUES (%s, %s, %s, %s, %s, %s, %s, %s)
+                RETURNING id, name, description, start_time, end_time, problems, created_at,
+                          submission_burst, submission_rate_per_minute, reuse_verdicts
             """,
-                (name, description, start_time, end_time, problems_json),
+                (
+                    name,
+                    description,
+                    start_time,
+                    end_time,
+                    problems_json,
+                    submission_burst,
+                    submission_rate_per_minute,
+                    reuse_verdicts,
+                ),
             )
 
             contest = self.cursor.fetchone()
+            self.set_contest_problems(contest["id"], problems)
             self.conn.commit()
+            active_contest_index.publish_change()
 
             return {
                 "id": contest["id"],
                 "name": contest["name"],
                 "description": contest["description"],
-                "start_time": self.convert_to_local_time(contest["start_time"]),
-                "end_time": self.convert_to_local_time(contest["end_time"]),
+                "start_time": self.convert_to_local_time(
+                    contest["start_time"], timezone_name, compact
+                ),
+                "end_time": self.convert_to_local_time(
+                    contest["end_time"], timezone_name, compact
+                ),
                 "problems": contest["problems"],
-                "created_at": self.convert_to_local_time(contest["created_at"]),
+                "created_at": self.convert_to_local_time(
+                    contest["created_at"], timezone_name, compact
+                ),
+                "submission_burst": contest["submission_burst"],
+                "submission_rate_per_minute": contest["submission_rate_per_minute"],
+                "reuse_verdicts": contest["reuse_verdicts"],
             }
         except Exception as e:
             self.conn.rollback()
             raise e
 
+    def set_contest_problems(self, contest_id, problems):
+        """
+        Sync contest_problems with a contest's problem list (the caller commits)
+        """
+        self.cursor.execute(
+            "DELETE FROM contest_problems WHERE contest_id = %s", (contest_id,)
+        )
+        self.cursor.execute(
+            """
+            INSERT INTO contest_problems (contest_id, problem_id, ordinal)
+            SELECT %s, problem_id, ordinal
+            FROM unnest(%s::varchar[]) WITH ORDINALITY AS p(problem_id, ordinal)
+            ON CONFLICT (contest_id, problem_id) DO NOTHING
+        """,
+            (contest_id, [str(problem_id) for problem_id in problems]),
+        )
+
     def get_problem_ids(self, contest_id):
         """Get the contest problems"""
         self.cursor.execute(
@@ -165,17 +284,22 @@ class ContestService:
         return list(problems["problems"])
 
     def get_problem_data(self, contest_id):
-        """Get the problem data"""
+        """Get the problem data, from the problem catalogue when it lists them all"""
         problems = self.get_problem_ids(contest_id)
-        print("problems===", problems, flush=True)
-        judge_url = f"{self.judge_base_url}/problems?problems={problems}"
-        response = requests.get(judge_url)
-        print("response===", response.json())
+        try:
+            entries = self.catalogue.find(problems)
+        except requests.RequestException:
+            entries = None
+        if entries is not None:
+            return {"problems": entries}
+
+        response = self.judge.get(
+            f"/problems?problems={problems}", endpoint="/problems?problems"
+        )
         return response.json()
 
-    def get_contest_leaderboard(self, contest_id):
-        """Get the leaderboard for a specific contest"""
-        # Get contest info
+    def _get_leaderboard_contest(self, contest_id):
+        """Get the contest row a leaderboard is built for"""
         self.cursor.execute(
             """
             SELECT id, name, start_time, end_time, problems
@@ -183,243 +307,86 @@ class ContestService:
         """,
             (contest_id,),
         )
+        return self.cursor.fetchone()
 
-        contest = self.cursor.fetchone()
-        if not contest:
-            return None
-
-        # Get leaderboard data for ALL registered users (including those with no submissions)
+    def _get_pending_cells(self, contest):
+        """Get (user_id, problem_id) pairs of participants with a pending submission"""
         self.cursor.execute(
             """
-            SELECT 
-                u.id as user_id,
-                u.username,
-                COUNT(DISTINCT CASE WHEN cs.is_accepted = TRUE THEN cs.problem_id END) as problems_solved,
-                COALESCE(SUM(CASE WHEN cs.is_accepted = TRUE AND cs.submission_time = (
-                    SELECT MIN(cs2.submission_time) 
-                    FROM contest_submissions cs2 
-                    WHERE cs2.contest_id = cs.contest_id 
-                    AND cs2.user_id = cs.user_id 
-                    AND cs2.problem_id = cs.problem_id 
-                    AND cs2.is_accepted = TRUE
-                ) THEN cs.score END), 0) as total_score,
-                0 as total_penalty,  -- Will calculate penalty properly below
-                MIN(CASE WHEN cs.is_accepted = TRUE THEN cs.submission_time END) as first_solve_time
-            FROM users u
-            INNER JOIN contest_participants cp ON u.id = cp.user_id AND cp.contest_id = %s
-            LEFT JOIN contest_submissions cs ON u.id = cs.user_id AND cs.contest_id = %s
-            GROUP BY u.id, u.username
-            ORDER BY problems_solved DESC, total_score DESC, first_solve_time ASC
+            SELECT DISTINCT s.user_id, s.problem_id
+            FROM submissions s
+            JOIN contest_participants cp ON cp.user_id = s.user_id
+            WHERE cp.contest_id = %s
+            AND s.status = 'pending'
+            AND s.problem_id = ANY(%s)
         """,
-            (contest_id, contest_id),
+            (contest["id"], [str(p) for p in contest["problems"] or []]),
         )
+        return {(row["user_id"], row["problem_id"]) for row in self.cursor.fetchall()}
 
-        leaderboard = self.cursor.fetchall()
+    def _compute_leaderboard_from_history(self, contest):
+        """Compute leaderboard entries from the full contest_submissions history"""
+        # All registered users, including those with no submissions
+        self.cursor.execute(
+            """
+            SELECT u.id as user_id, u.username
+            FROM contest_participants cp
+            JOIN users u ON u.id = cp.user_id
+            WHERE cp.contest_id = %s
+            ORDER BY u.id
+        """,
+            (contest["id"],),
+        )
+        participants = self.cursor.fetchall()
 
-        # Calculate penalty times properly for each user
-        for entry in leaderboard:
-            user_id = entry["user_id"]
-            total_penalty = 0
+        self.cursor.execute(
+            """
+            SELECT user_id, problem_id, submission_time, is_accepted, score
+            FROM contest_submissions
+            WHERE contest_id = %s
+            ORDER BY submission_time ASC, id ASC
+        """,
+            (contest["id"],),
+        )
+        submissions = self.cursor.fetchall()
 
-            # Get problems that this user eventually solved
-            self.cursor.execute(
-                """
-                SELECT DISTINCT problem_id 
-                FROM contest_submissions 
-                WHERE contest_id = %s AND user_id = %s AND is_accepted = TRUE
-                """,
-                (contest_id, user_id),
-            )
-            solved_problems = [row["problem_id"] for row in self.cursor.fetchall()]
-
-            # For each solved problem, count wrong submissions before the accepted one
-            for problem_id in solved_problems:
-                self.cursor.execute(
-                    """
-                    SELECT COUNT(*) as wrong_attempts
-                    FROM contest_submissions cs1
-                    WHERE cs1.contest_id = %s 
-                    AND cs1.user_id = %s 
-                    AND cs1.problem_id = %s
-                    AND cs1.is_accepted = FALSE
-                    AND cs1.submission_time < (
-                        SELECT MIN(cs2.submission_time)
-                        FROM contest_submissions cs2
-                        WHERE cs2.contest_id = %s 
-                        AND cs2.user_id = %s 
-                        AND cs2.problem_id = %s
-                        AND cs2.is_accepted = TRUE
-                    )
-                    """,
-                    (
-                        contest_id,
-                        user_id,
-                        problem_id,
-                        contest_id,
-                        user_id,
-                        problem_id,
-                    ),
-                )
-                wrong_attempts = self.cursor.fetchone()["wrong_attempts"]
-                total_penalty += (
-                    wrong_attempts * 20
-                )  # 20 minutes penalty per wrong attempt
-
-            # Update the entry with calculated penalty
-            entry["total_penalty"] = total_penalty
-
-        # Sort leaderboard properly: by problems solved (desc), then by penalty (asc), then by first solve time (asc)
-        leaderboard = sorted(
-            leaderboard,
-            key=lambda x: (
-                -x["problems_solved"],
-                x["total_penalty"],
-                x["first_solve_time"] or datetime.max.replace(tzinfo=timezone.utc),
-            ),
+        return build_leaderboard_from_history(
+            contest, participants, submissions, self._get_pending_cells(contest)
         )
 
-        # Get first blood information for each problem
-        first_blood = {}
-        for problem_id in contest["problems"]:
-            self.cursor.execute(
-                """
-                SELECT user_id, MIN(submission_time) as first_solve_time
-                FROM contest_submissions 
-                WHERE contest_id = %s AND problem_id = %s AND is_accepted = TRUE
-                GROUP BY user_id
-                ORDER BY first_solve_time ASC
-                LIMIT 1
-                """,
-                (contest_id, problem_id),
-            )
-            first_solver = self.cursor.fetchone()
-            if first_solver:
-                first_blood[problem_id] = first_solver["user_id"]
+    def _get_leaderboard_entries(self, contest):
+        """Get leaderboard entries from the maintained standings tables"""
+        standings, cells = self.standings.get_standings(contest["id"])
+        return build_leaderboard(
+            contest, standings, cells, self._get_pending_cells(contest)
+        )
 
-        # Convert to list of dictionaries and add problem status for each user
-        result = []
-        for i, entry in enumerate(leaderboard):
-            user_id = entry["user_id"]
-
-            # Get problem status for each problem in the contest
-            problem_statuses = {}
-            for problem_id in contest["problems"]:
-                # Get all submissions for this user-problem combination
-                self.cursor.execute(
-                    """
-                    SELECT is_accepted, submission_time 
-                    FROM contest_submissions 
-                    WHERE contest_id = %s AND user_id = %s AND problem_id = %s 
-                    ORDER BY submission_time ASC
-                    """,
-                    (contest_id, user_id, problem_id),
-                )
-                submissions = self.cursor.fetchall()
-
-                if not submissions:
-                    # Check if there are any pending submissions from main submissions table
-                    self.cursor.execute(
-                        """
-                        SELECT status FROM submissions 
-                        WHERE user_id = %s AND problem_id = %s AND status = 'pending'
-                        ORDER BY submission_time DESC LIMIT 1
-                        """,
-                        (user_id, problem_id),
-                    )
-                    pending_submission = self.cursor.fetchone()
-
-                    if pending_submission:
-                        problem_statuses[problem_id] = {
-                            "status": "pending",
-                            "attempts": 0,
-                            "solve_time": None,
-                            "is_first_blood": False,
-                        }
-                    else:
-                        problem_statuses[problem_id] = {
-                            "status": "untried",
-                            "attempts": 0,
-                            "solve_time": None,
-                            "is_first_blood": False,
-                        }
-                else:
-                    # Check if any submission was accepted
-                    accepted_submission = next(
-                        (s for s in submissions if s["is_accepted"]), None
-                    )
-
-                    if accepted_submission:
-                        # Calculate solve time from contest start
-                        contest_start = contest["start_time"]
-                        if contest_start.tzinfo is None:
-                            contest_start = contest_start.replace(tzinfo=timezone.utc)
-
-                        solve_time = accepted_submission["submission_time"]
-                        if solve_time.tzinfo is None:
-                            solve_time = solve_time.replace(tzinfo=timezone.utc)
-
-                        solve_minutes = int(
-                            (solve_time - contest_start).total_seconds() / 60
-                        )
+    def get_contest_leaderboard(self, contest_id, timezone_name="UTC", compact=False):
+        """Get the leaderboard for a specific contest"""
+        contest = self._get_leaderboard_contest(contest_id)
+        if not contest:
+            return None
 
-                        # Count penalty attempts (wrong attempts before first accepted)
-                        penalty_attempts = 0
-                        for sub in submissions:
-                            if (
-                                not sub["is_accepted"]
-                                and sub["submission_time"]
-                                < accepted_submission["submission_time"]
-                            ):
-                                penalty_attempts += 1
-
-                        problem_statuses[problem_id] = {
-                            "status": "solved",
-                            "attempts": len(submissions),
-                            "penalty_attempts": penalty_attempts,
-                            "solve_time": solve_minutes,
-                            "is_first_blood": first_blood.get(problem_id) == user_id,
-                        }
-                    else:
-                        # Check if there are any pending submissions from main submissions table
-                        self.cursor.execute(
-                            """
-                            SELECT status FROM submissions 
-                            WHERE user_id = %s AND problem_id = %s AND status = 'pending'
-                            ORDER BY submission_time DESC LIMIT 1
-                            """,
-                            (user_id, problem_id),
-                        )
-                        pending_submission = self.cursor.fetchone()
-
-                        if pending_submission:
-                            problem_statuses[problem_id] = {
-                                "status": "pending",
-                                "attempts": len(submissions),
-                                "solve_time": None,
-                                "is_first_blood": False,
-                            }
-                        else:
-                            problem_statuses[problem_id] = {
-                                "status": "attempted",
-                                "attempts": len(submissions),
-                                "solve_time": None,
-                                "is_first_blood": False,
-                            }
+        entries = self._get_leaderboard_entries(contest)
 
+        result = []
+        for entry in entries:
             result.append(
                 {
-                    "rank": i + 1,
+                    "rank": entry["rank"],
                     "user_id": entry["user_id"],
                     "username": entry["username"],
-                    "problems_solved": entry["problems_solved"] or 0,
-                    "total_score": entry["total_score"] or 0,
-                    "total_penalty": entry["total_penalty"] or 0,
+                    "problems_solved": entry["problems_solved"],
+                    "total_score": entry["total_score"],
+                    "total_penalty": entry["total_penalty"],
                     "first_solve_time": (
-                        self.convert_to_local_time(entry["first_solve_time"])
+                        self.convert_to_local_time(
+                            entry["first_solve_time"], timezone_name, compact
+                        )
                         if entry["first_solve_time"]
                         else None
                     ),
-                    "problem_statuses": problem_statuses,
+                    "problem_statuses": entry["problem_statuses"],
                 }
             )
 
@@ -427,14 +394,41 @@ class ContestService:
             "contest": {
                 "id": contest["id"],
                 "name": contest["name"],
-                "start_time": self.convert_to_local_time(contest["start_time"]),
-                "end_time": self.convert_to_local_time(contest["end_time"]),
+                "start_time": self.convert_to_local_time(
+                    contest["start_time"], timezone_name, compact
+                ),
+                "end_time": self.convert_to_local_time(
+                    contest["end_time"], timezone_name, compact
+                ),
                 "problems": contest["problems"],
             },
             "leaderboard": result,
         }
 
-    def get_user_contest_submissions(self, contest_id, user_id):
+    def check_standings(self, contest_id):
+        """
+        Compare the maintained standings with a full recomputation
+
+        Returns the user_ids whose leaderboard entry differs, or None if the
+        contest does not exist.
+        """
+        contest = self._get_leaderboard_contest(contest_id)
+        if not contest:
+            return None
+
+        expected = {
+            e["user_id"]: e for e in self._compute_leaderboard_from_history(contest)
+        }
+        actual = {e["user_id"]: e for e in self._get_leaderboard_entries(contest)}
+        return sorted(
+            user_id
+            for user_id in expected.keys() | actual.keys()
+            if expected.get(user_id) != actual.get(user_id)
+        )
+
+    def get_user_contest_submissions(
+        self, contest_id, user_id, timezone_name="UTC", compact=False
+    ):
         """Get all submissions for a user in a specific contest"""
         # Check if there are any contest submissions for this contest
         self.cursor.execute(
@@ -457,7 +451,9 @@ class ContestService:
                 cs.score,
                 cs.penalty_time,
                 s.language,
-                s.judge_response
+                s.tests_passed,
+                s.tests_failed,
+                s.verdict
             FROM contest_submissions cs
             JOIN submissions s ON cs.submission_id = s.id
             WHERE cs.contest_id = %s AND cs.user_id = %s
@@ -475,13 +471,15 @@ class ContestService:
                     "id": sub["id"],
                     "problem_id": sub["problem_id"],
                     "submission_time": self.convert_to_local_time(
-                        sub["submission_time"]
+                        sub["submission_time"], timezone_name, compact
                     ),
                     "is_accepted": sub["is_accepted"],
                     "score": sub["score"],
                     "penalty_time": sub["penalty_time"],
                     "language": sub["language"],
-                    "judge_response": sub["judge_response"],
+                    "tests_passed": sub["tests_passed"],
+                    "tests_failed": sub["tests_failed"],
+                    "verdict": sub["verdict"],
                 }
             )
 
@@ -500,7 +498,9 @@ class ContestService:
         result = self.cursor.fetchone()
         return result is not None
 
-    def get_user_registration_data(self, contest_id, user_id):
+    def get_user_registration_data(
+        self, contest_id, user_id, timezone_name="UTC", compact=False
+    ):
         """Get detailed registration data for a user in a contest"""
         self.cursor.execute(
             """
@@ -522,7 +522,9 @@ class ContestService:
         if result:
             return {
                 "registration_id": result["id"],
-                "registered_at": self.convert_to_local_time(result["registered_at"]),
+                "registered_at": self.convert_to_local_time(
+                    result["registered_at"], timezone_name, compact
+                ),
                 "username": result["username"],
                 "contest_name": result["contest_name"],
             }
@@ -553,6 +555,7 @@ class ContestService:
             """,
                 (contest_id, user_id),
             )
+            self.standings.bump_version(contest_id)
 
             self.conn.commit()
             return {"success": True, "message": "Successfully registered for contest"}
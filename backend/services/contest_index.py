@@ -0,0 +1,172 @@
+import bisect
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from psycopg2 import extras
+from config import ACTIVE_CONTEST_INDEX_REFRESH, ACTIVE_CONTEST_INDEX_GRACE
+from services.connection import get_connection
+from services.leaderboard import _as_utc
+from services.notifier import Notifier
+from utils.logger import log_error, log_info
+
+
+class ActiveContestIndex:
+    """
+    Process-local interval index of the contests near the current time
+
+    Maps each problem_id to the (start, end, contest_id) intervals of the
+    contests containing it, for contests that ended at most `grace` seconds
+    before the last rebuild or start at most two refresh intervals after it.
+    Inside that window the index answers "which contests was a submission
+    made in" without touching the database; outside it, or before the first
+    rebuild, `lookup` returns None and callers fall back to a query.
+
+    Rebuilt every `refresh_interval` seconds and whenever a contest is
+    created. Creating a contest first invalidates the index of the creating
+    process, so lookups fall back to a query until the rebuild is done; other
+    processes only learn about the contest through the Notifier, so
+    deployments with several backend processes need NOTIFY_BACKEND=postgres.
+    """
+
+    def __init__(
+        self,
+        refresh_interval=ACTIVE_CONTEST_INDEX_REFRESH,
+        grace=ACTIVE_CONTEST_INDEX_GRACE,
+    ):
+        self.refresh_interval = refresh_interval
+        self.grace = grace
+        self.notifier = Notifier("contest_index")
+        self.notifier.add_callback(lambda key: self._rebuild_or_invalidate())
+        self._lock = threading.Lock()
+        self._by_problem = {}
+        self._window = None
+        self._generation = 0
+        self._built_at = None
+        self._thread = None
+
+    def rebuild(self):
+        """Reload the contests overlapping the index window"""
+        with self._lock:
+            generation = self._generation
+        now = datetime.now(timezone.utc)
+        window = (
+            now - timedelta(seconds=self.grace),
+            now + timedelta(seconds=2 * self.refresh_interval),
+        )
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT p.problem_id, c.id, c.start_time, c.end_time
+                FROM contests c
+                JOIN contest_problems p ON p.contest_id = c.id
+                WHERE c.end_time >= %s AND c.start_time <= %s
+                ORDER BY c.start_time, c.id
+            """,
+                window,
+            )
+            rows = cursor.fetchall()
+
+        by_problem = {}
+        for row in rows:
+            by_problem.setdefault(row["problem_id"], []).append(
+                (_as_utc(row["start_time"]), _as_utc(row["end_time"]), row["id"])
+            )
+
+        with self._lock:
+            if generation != self._generation:
+                return  # Invalidated meanwhile: may miss the new contest
+            self._by_problem = by_problem
+            self._window = window
+            self._built_at = time.monotonic()
+
+    def invalidate(self):
+        """Make lookups fall back to a query until the next rebuild"""
+        with self._lock:
+            self._generation += 1
+            self._window = None
+
+    def _rebuild_or_invalidate(self):
+        try:
+            self.rebuild()
+        except Exception as e:
+            self.invalidate()
+            log_error(f"Active contest index rebuild failed: {e}")
+
+    def lookup(self, problem_id, submission_time):
+        """
+        Contests containing `problem_id` whose [start, end) covers
+        `submission_time`, as (start, end, contest_id) tuples
+
+        Returns None when the index can't answer for that time.
+        """
+        submission_time = _as_utc(submission_time)
+        with self._lock:
+            window = self._window
+            intervals = self._by_problem.get(str(problem_id), ())
+        if window is None or not window[0] <= submission_time <= window[1]:
+            return None
+
+        # Intervals are sorted by start; only those starting by then can match
+        last = bisect.bisect_right(
+            [start for start, _, _ in intervals], submission_time
+        )
+        return [
+            interval
+            for interval in intervals[:last]
+            if interval[0] <= submission_time < interval[1]
+        ]
+
+    def publish_change(self):
+        """
+        Rebuild the index in every process after a contest was committed
+
+        Failures are only logged: the contest is already committed, and this
+        process's index stays invalidated until a rebuild succeeds.
+        """
+        self.invalidate()
+        try:
+            self.notifier.publish("rebuild")
+        except Exception as e:
+            log_error(f"Active contest index rebuild request failed: {e}")
+
+    def start(self):
+        """Load the index and keep refreshing it in a background thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="active-contest-index", daemon=True
+        )
+        self._thread.start()
+        self.notifier.start()
+        log_info(f"Active contest index refreshing every {self.refresh_interval}s")
+
+    def _run(self):
+        while True:
+            try:
+                self.rebuild()
+            except Exception as e:
+                log_error(f"Active contest index rebuild failed: {e}")
+            time.sleep(self.refresh_interval)
+
+    def stats(self):
+        """Indexed contests and problems, and the age of the index"""
+        with self._lock:
+            return {
+                "problems": len(self._by_problem),
+                "contests": len(
+                    {
+                        c
+                        for intervals in self._by_problem.values()
+                        for *_, c in intervals
+                    }
+                ),
+                "age_seconds": (
+                    round(time.monotonic() - self._built_at, 3)
+                    if self._built_at is not None
+                    else None
+                ),
+            }
+
+
+active_contest_index = ActiveContestIndex()
@@ -0,0 +1,137 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+import requests
+from psycopg2 import extras
+from config import CONTEST_WARMUP_LEAD, CONTEST_WARMUP_POLL_INTERVAL
+from services.connection import get_connection
+from services.leaderboard_feed import leaderboard_feed
+from services.problem_catalogue import problem_catalogue
+from services.statement_cache import statement_cache
+from utils.logger import log_error, log_info
+
+
+class ContestWarmer:
+    """
+    Pre-warms this process's caches shortly before each contest starts
+
+    Every `poll_interval` seconds, contests starting within `lead` seconds
+    (or that started less than `lead` seconds ago, e.g. after a restart) are
+    warmed once: the problem catalogue is reloaded, the statement PDFs are
+    fetched into the statement cache and the leaderboard feed computes the
+    contest's (still empty) board. Keep `lead` above `poll_interval`.
+    """
+
+    def __init__(
+        self, lead=CONTEST_WARMUP_LEAD, poll_interval=CONTEST_WARMUP_POLL_INTERVAL
+    ):
+        self.lead = lead
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._warmed = {}
+        self._last = None
+        self._thread = None
+
+    def _due_contests(self):
+        """Contests starting around now, with their problems in order"""
+        now = datetime.now(timezone.utc)
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT c.id, c.start_time,
+                       COALESCE(
+                           array_agg(p.problem_id ORDER BY p.ordinal)
+                           FILTER (WHERE p.problem_id IS NOT NULL),
+                           '{}'
+                       ) AS problems
+                FROM contests c
+                LEFT JOIN contest_problems p ON p.contest_id = c.id
+                WHERE c.start_time BETWEEN %s AND %s
+                GROUP BY c.id
+                ORDER BY c.start_time
+            """,
+                (
+                    now - timedelta(seconds=self.lead),
+                    now + timedelta(seconds=self.lead),
+                ),
+            )
+            return cursor.fetchall()
+
+    def warm(self, contest_id, problem_ids):
+        """Load one contest's problems, statements and leaderboard"""
+        started = time.monotonic()
+        failures = 0
+
+        try:
+            problem_catalogue.refresh()
+        except (requests.RequestException, KeyError):
+            failures += 1  # The stale catalogue keeps being served
+
+        for problem_id in problem_ids:
+            try:
+                statement_cache.get(problem_id)
+            except (requests.RequestException, OSError) as e:
+                failures += 1
+                log_error(f"Could not warm statement of {problem_id}: {e}")
+
+        try:
+            leaderboard_feed.snapshot(contest_id)
+        except Exception as e:
+            failures += 1
+            log_error(f"Could not warm leaderboard of contest {contest_id}: {e}")
+
+        elapsed_ms = (time.monotonic() - started) * 1000
+        with self._lock:
+            self._last = {
+                "contest_id": contest_id,
+                "problems": len(problem_ids),
+                "failures": failures,
+                "duration_ms": round(elapsed_ms, 3),
+            }
+        log_info(
+            f"Warmed contest {contest_id} ({len(problem_ids)} problems, "
+            f"{failures} failures) in {elapsed_ms:.0f} ms"
+        )
+
+    def run_once(self):
+        """Warm the contests that are due and were not warmed yet"""
+        for contest in self._due_contests():
+            key = (contest["id"], contest["start_time"])
+            with self._lock:
+                if key in self._warmed:
+                    continue
+                self._warmed[key] = time.monotonic()
+            self.warm(contest["id"], list(contest["problems"]))
+
+        # Forget contests that left the window
+        cutoff = time.monotonic() - 3 * self.lead
+        with self._lock:
+            for key in [k for k, at in self._warmed.items() if at < cutoff]:
+                del self._warmed[key]
+
+    def start(self):
+        """Start the warm-up scheduler thread"""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(
+            target=self._run, name="contest-warmer", daemon=True
+        )
+        self._thread.start()
+        log_info(f"Warming contests {self.lead}s before they start")
+
+    def _run(self):
+        while True:
+            try:
+                self.run_once()
+            except Exception as e:
+                log_error(f"Contest warm-up failed: {e}")
+            time.sleep(self.poll_interval)
+
+    def stats(self):
+        """Contests warmed recently and the last warm-up"""
+        with self._lock:
+            return {"warmed": len(self._warmed), "last": self._last}
+
+
+contest_warmer = ContestWarmer()
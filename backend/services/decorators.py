@@ -1,6 +1,6 @@
 from functools import wraps
 from flask import request, jsonify
-from services.auth import AuthService
+from services.auth import token_verifier
 
 
 def get_token_from_request():
@@ -31,7 +31,7 @@ def require_auth(f):
             print(f"[AUTH DEBUG] No token found. Headers: {dict(request.headers)}")
             return jsonify({"message": "Token is missing"}), 401
         try:
-            payload = AuthService().verify_token(token)
+            payload = token_verifier.verify(token)
 
             if payload["user_id"] is None:
                 return jsonify({"message": "Unauthorized"}), 401
@@ -58,7 +58,7 @@ def require_admin(f):
         if not token:
             return jsonify({"message": "Token is missing"}), 401
         try:
-            payload = AuthService().verify_token(token)
+            payload = token_verifier.verify(token)
 
             if payload["user_id"] is None:
                 return jsonify({"message": "Unauthorized"}), 401
@@ -0,0 +1,426 @@
+import json
+import threading
+from psycopg2 import extras
+from config import (
+    JUDGE_CALLBACK_URL,
+    JUDGE_DISPATCH_WORKERS,
+    JUDGE_DISPATCH_MAX_ATTEMPTS,
+    JUDGE_DISPATCH_BACKOFF,
+    JUDGE_DISPATCH_MAX_BACKOFF,
+    JUDGE_DISPATCH_POLL_INTERVAL,
+    JUDGE_DISPATCH_LEASE,
+    JUDGE_DISPATCH_LANE_WEIGHTS,
+)
+from services.connection import get_connection
+from services.judge_client import judge_client, JudgeUnavailable
+from services.notifier import verdict_notifier
+from services.standings import StandingsService
+from utils.logger import log_error, log_info, log_warning
+
+# Queue lanes; SubmissionService.submit_solution picks the contest lane for
+# submissions to a running contest the user is registered for (registered_contest)
+LANES = ("contest", "practice")
+
+
+class JudgeDispatcher:
+    """
+    Background dispatcher draining the judge_dispatch_queue outbox
+
+    Submissions are stored durably together with their source and picked up
+    by worker threads with `SELECT ... FOR UPDATE SKIP LOCKED`, so several
+    workers (and several backend processes) can drain the queue without
+    handing the same submission to the judge twice. A claimed submission is
+    leased (its next attempt is pushed `lease` seconds out) and the claim is
+    committed before the judge is called, so no transaction or pooled
+    connection is held during the send; if the worker dies, the submission
+    is picked up again once the lease runs out. Failed sends are retried
+    with exponential backoff. While the judge client's circuit breakers are
+    open, submissions stay queued untouched (no attempt is used up). If
+    recording a send the judge accepted fails, the process's workers retry
+    it before claiming anything else, so it is recorded as soon as the
+    database answers again, normally well within the lease that keeps other
+    workers from sending it again.
+
+    The queue has a contest and a practice lane. Workers share dispatches
+    between the lanes with waiting submissions in proportion to
+    `lane_weights` (smooth weighted round-robin, per process); a lane with
+    nothing due leaves its share to the others.
+    """
+
+    def __init__(
+        self,
+        workers=JUDGE_DISPATCH_WORKERS,
+        max_attempts=JUDGE_DISPATCH_MAX_ATTEMPTS,
+        backoff=JUDGE_DISPATCH_BACKOFF,
+        max_backoff=JUDGE_DISPATCH_MAX_BACKOFF,
+        poll_interval=JUDGE_DISPATCH_POLL_INTERVAL,
+        lease=JUDGE_DISPATCH_LEASE,
+        lane_weights=JUDGE_DISPATCH_LANE_WEIGHTS,
+    ):
+        self.judge = judge_client
+        self.standings = StandingsService()
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.lane_weights = {lane: lane_weights.get(lane, 1) for lane in LANES}
+        self._wakeup = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._dispatched = 0
+        self._retries = 0
+        self._failed = 0
+        # Sends the judge accepted that couldn't be recorded yet
+        self._unrecorded = []
+        self._lane_credit = dict.fromkeys(LANES, 0)
+        self._lane_waits = {
+            lane: {"dispatched": 0, "total_wait": 0.0, "max_wait": 0.0}
+            for lane in LANES
+        }
+
+    def start(self):
+        """Start the worker threads (once per process)"""
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(
+                    target=self._run, name=f"judge-dispatch-{i}", daemon=True
+                )
+                thread.start()
+                self._threads.append(thread)
+        log_info(f"Judge dispatcher started with {self.workers} workers")
+
+    def notify(self):
+        """Wake idle workers after a submission was queued"""
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            try:
+                if self.dispatch_one():
+                    continue
+            except Exception as e:
+                log_error(f"Judge dispatcher error: {e}")
+            self._wakeup.wait(self.poll_interval)
+            self._wakeup.clear()
+
+    def _backoff_seconds(self, attempts):
+        return min(self.backoff * (2 ** (attempts - 1)), self.max_backoff)
+
+    def _send(self, job):
+        """
+        Post one queued submission to the judge, returning its judge id and
+        the judge node that took it
+
+        Only a failed send raises. Once the judge accepted the submission
+        (2xx), it is dispatched even if the body can't be read: the judge id
+        is then None, as resending would judge the submission twice.
+        """
+        files = {"code": (job["file_name"], bytes(job["source"]))}
+        payload = {
+            "problemID": job["problem_id"],
+            "language": job["language"],
+            "submission_id": str(job["submission_id"]),
+            "callback_url": JUDGE_CALLBACK_URL,
+        }
+        response = self.judge.post("/judge", files=files, data=payload)
+        response.raise_for_status()
+        try:
+            judge_submission_id = response.json().get("submissionId")
+        except (ValueError, AttributeError) as e:
+            log_warning(
+                f"Judge {response.judge_node} accepted submission "
+                f"{job['submission_id']} with an unreadable response: {e}"
+            )
+            judge_submission_id = None
+        return judge_submission_id, response.judge_node
+
+    def _claim(self, cursor):
+        """Lease the next due submission, taking turns between the lanes"""
+        with self._lock:
+            for lane, weight in self.lane_weights.items():
+                self._lane_credit[lane] += weight
+            order = sorted(LANES, key=lambda lane: -self._lane_credit[lane])
+
+        job = None
+        for tried, lane in enumerate(order):
+            cursor.execute(
+                """
+                SELECT id, submission_id, problem_id, language, file_name,
+                       source, attempts, lane, next_attempt_at,
+                       EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - created_at)
+                           AS wait_seconds
+                FROM judge_dispatch_queue
+                WHERE lane = %s AND next_attempt_at <= CURRENT_TIMESTAMP
+                ORDER BY next_attempt_at, id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+            """,
+                (lane,),
+            )
+            job = cursor.fetchone()
+            if job:
+                cursor.execute(
+                    """
+                    UPDATE judge_dispatch_queue
+                    SET next_attempt_at =
+                        CURRENT_TIMESTAMP + %s * INTERVAL '1 second'
+                    WHERE id = %s
+                """,
+                    (self.lease, job["id"]),
+                )
+                break
+
+        with self._lock:
+            # Lanes found empty don't bank credit for later bursts
+            for lane in order[: tried if job else len(order)]:
+                self._lane_credit[lane] = 0
+            total = sum(self.lane_weights.values())
+            if job:
+                self._lane_credit[job["lane"]] -= total
+            # A lane draining alone must not run up a debt that starves it
+            # once the other lane has work again
+            for lane, credit in self._lane_credit.items():
+                self._lane_credit[lane] = max(-total, min(total, credit))
+        return job
+
+    def dispatch_one(self):
+        """
+        Claim and send the next due submission
+
+        Returns False when there was nothing to dispatch, or the judge is
+        unavailable.
+        """
+        if not self._record_unrecorded():
+            return False
+        if not self.judge.available():
+            return False
+
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            job = self._claim(cursor)
+            conn.commit()
+        if not job:
+            return False
+
+        with self._lock:
+            self._in_flight += 1
+        try:
+            judge_submission_id, judge_node = self._send(job)
+        except JudgeUnavailable:
+            # The breaker opened meanwhile: give the lease back untouched
+            self._release(job)
+            return False
+        except Exception as e:
+            with get_connection() as conn:
+                cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+                gave_up = self._record_failure(cursor, job, e)
+                conn.commit()
+            if gave_up:
+                verdict_notifier.publish(job["submission_id"])
+            return True
+        finally:
+            with self._lock:
+                self._in_flight -= 1
+
+        try:
+            self._record_dispatch(job, judge_submission_id, judge_node)
+        except Exception as e:
+            log_error(
+                f"Recording the dispatch of submission {job['submission_id']} "
+                f"failed, retrying: {e}"
+            )
+            with self._lock:
+                self._unrecorded.append((job, judge_submission_id, judge_node))
+        return True
+
+    def _record_dispatch(self, job, judge_submission_id, judge_node):
+        """Store the judge id of a sent submission and drop it from the queue"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                """
+                UPDATE submissions
+                SET judge_submission_id = %s, judge_node = %s
+                WHERE id = %s
+            """,
+                (judge_submission_id, judge_node, job["submission_id"]),
+            )
+            cursor.execute(
+                "DELETE FROM judge_dispatch_queue WHERE id = %s", (job["id"],)
+            )
+            conn.commit()
+
+        wait = float(job["wait_seconds"])
+        with self._lock:
+            self._dispatched += 1
+            waits = self._lane_waits[job["lane"]]
+            waits["dispatched"] += 1
+            waits["total_wait"] += wait
+            waits["max_wait"] = max(waits["max_wait"], wait)
+        log_info(
+            f"Dispatched {job['lane']} submission {job['submission_id']} to judge "
+            f"{judge_node} (judge id: {judge_submission_id})"
+        )
+
+    def _record_unrecorded(self):
+        """
+        Retry recording sends the judge accepted; returns False while some
+        still fail
+        """
+        with self._lock:
+            pending, self._unrecorded = self._unrecorded, []
+        failed = []
+        for job, judge_submission_id, judge_node in pending:
+            try:
+                self._record_dispatch(job, judge_submission_id, judge_node)
+            except Exception as e:
+                log_error(
+                    f"Recording the dispatch of submission {job['submission_id']} "
+                    f"failed again: {e}"
+                )
+                failed.append((job, judge_submission_id, judge_node))
+        with self._lock:
+            self._unrecorded.extend(failed)
+        return not failed
+
+    def _release(self, job):
+        """Hand a leased submission back without using up an attempt"""
+        with get_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute(
+                "UPDATE judge_dispatch_queue SET next_attempt_at = %s WHERE id = %s",
+                (job["next_attempt_at"], job["id"]),
+            )
+            conn.commit()
+
+    def _record_failure(self, cursor, job, error):
+        """
+        Reschedule a failed send, or give up after max_attempts
+
+        Returns True when the submission was given up on.
+        """
+        attempts = job["attempts"] + 1
+        if attempts >= self.max_attempts:
+            cursor.execute(
+                """
+                INSERT INTO submission_details (submission_id, judge_response)
+                VALUES (%(id)s, %(judge_response)s)
+                ON CONFLICT (submission_id) DO UPDATE
+                SET judge_response = EXCLUDED.judge_response;
+                UPDATE submissions
+                SET status = 'error', tests_passed = NULL, tests_failed = NULL,
+                    verdict = NULL
+                WHERE id = %(id)s
+                RETURNING user_id
+            """,
+                {
+                    "id": job["submission_id"],
+                    "judge_response": json.dumps(
+                        {"error": f"Failed to contact judge server: {error}"}
+                    ),
+                },
+            )
+            self.standings.bump_pending_versions(
+                cursor.fetchone()["user_id"], job["problem_id"], cursor=cursor
+            )
+            cursor.execute(
+                "DELETE FROM judge_dispatch_queue WHERE id = %s", (job["id"],)
+            )
+            with self._lock:
+                self._failed += 1
+            log_error(
+                f"Giving up on submission {job['submission_id']} after "
+                f"{attempts} attempts: {error}"
+            )
+            return True
+
+        delay = self._backoff_seconds(attempts)
+        cursor.execute(
+            """
+            UPDATE judge_dispatch_queue
+            SET attempts = %s,
+                last_error = %s,
+                next_attempt_at = CURRENT_TIMESTAMP + %s * INTERVAL '1 second'
+            WHERE id = %s
+        """,
+            (attempts, str(error), delay, job["id"]),
+        )
+        with self._lock:
+            self._retries += 1
+        log_warning(
+            f"Judge dispatch of submission {job['submission_id']} failed "
+            f"(attempt {attempts}), retrying in {delay}s: {error}"
+        )
+        return False
+
+    def stats(self):
+        """Queue depth and dispatch counters, overall and per lane"""
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT
+                    COUNT(*) as depth,
+                    COUNT(*) FILTER (WHERE attempts > 0) as retrying,
+                    EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(created_at))
+                        as oldest_age_seconds
+                FROM judge_dispatch_queue
+            """
+            )
+            queue = cursor.fetchone()
+            cursor.execute(
+                """
+                SELECT lane, COUNT(*) as depth,
+                    EXTRACT(EPOCH FROM CURRENT_TIMESTAMP - MIN(created_at))
+                        as oldest_age_seconds
+                FROM judge_dispatch_queue
+                GROUP BY lane
+            """
+            )
+            lanes = {row["lane"]: row for row in cursor.fetchall()}
+            conn.rollback()
+
+        with self._lock:
+            return {
+                "workers": len(self._threads),
+                "paused": not self.judge.available(),
+                "queue_depth": queue["depth"],
+                "retrying": queue["retrying"],
+                "oldest_age_seconds": (
+                    float(queue["oldest_age_seconds"])
+                    if queue["oldest_age_seconds"] is not None
+                    else None
+                ),
+                "in_flight": self._in_flight,
+                "unrecorded": len(self._unrecorded),
+                "dispatched": self._dispatched,
+                "retries": self._retries,
+                "failed": self._failed,
+                "lanes": {
+                    lane: {
+                        "weight": self.lane_weights[lane],
+                        "queue_depth": lanes[lane]["depth"] if lane in lanes else 0,
+                        "oldest_age_seconds": (
+                            float(lanes[lane]["oldest_age_seconds"])
+                            if lane in lanes
+                            else None
+                        ),
+                        "dispatched": waits["dispatched"],
+                        "avg_wait_seconds": (
+                            round(waits["total_wait"] / waits["dispatched"], 3)
+                            if waits["dispatched"]
+                            else None
+                        ),
+                        "max_wait_seconds": round(waits["max_wait"], 3),
+                    }
+                    for lane, waits in self._lane_waits.items()
+                },
+            }
+
+
+judge_dispatcher = JudgeDispatcher()
@@ -1,6 +1,8 @@
-import os
 import requests
 from flask import Response
+from services.judge_client import judge_client
+from services.problem_catalogue import problem_catalogue
+from services.statement_cache import statement_cache
 
 
 class GeneralService:
@@ -9,77 +11,59 @@ class GeneralService:
     """
 
     def __init__(self):
-        judge_host = os.getenv("JUDGE_HOST", "mini-judge")
-        judge_port = os.getenv("JUDGE_PORT", "3000")
-        self.judge_base_url = f"http://{judge_host}:{judge_port}"
+        self.judge = judge_client
+        self.catalogue = problem_catalogue
+        self.statements = statement_cache
 
     def get_problems(self):
         """
-        Get all available problems from the judge server
+        Get all available problems from the judge server (cached)
         """
-        print("get_problems===\n\n", flush=True)
-        judge_url = f"{self.judge_base_url}/problems"
-        print("judge_url===\n\n", judge_url, flush=True)
-
         try:
-            judge_response = requests.get(judge_url)
-            judge_response.raise_for_status()
-            return {"problems": judge_response.json()["problems"]}
+            return {"problems": self.catalogue.problems()}
         except requests.RequestException as e:
             raise Exception(f"Failed to contact judge server: {e}")
 
     def get_problem_statement(self, problem_id):
         """
-        Get problem statement PDF from the judge server
+        Get the problem statement PDF from the on-disk statement cache,
+        fetching it from the judge server on a miss
         """
-        judge_url = f"{self.judge_base_url}/problem/{problem_id}/statement"
-
         try:
-            judge_response = requests.get(judge_url, stream=True)
-            judge_response.raise_for_status()
-
-            # Return the response object for streaming
-            return {
-                "content": judge_response.iter_content(chunk_size=8192),
-                "content_type": judge_response.headers.get(
-                    "content-type", "application/pdf"
-                ),
-                "content_disposition": judge_response.headers.get(
-                    "content-disposition",
-                    f'inline; filename="problem_{problem_id}_statement.pdf"',
-                ),
-            }
+            return self.statements.get(problem_id)
         except requests.RequestException as e:
             raise Exception(f"Failed to get problem statement: {e}")
 
     def get_problem_metadata(self, problem_id):
         """
-        Get metadata for a specific problem from the judge server
+        Get metadata for a specific problem, from the problem catalogue or,
+        for problems not listed there, from the judge server
         """
-        judge_url = f"{self.judge_base_url}/problem/{problem_id}/metadata"
+        try:
+            problem = self.catalogue.problem(problem_id)
+        except requests.RequestException:
+            problem = None
+        if problem is not None:
+            return problem
 
         try:
-            judge_response = requests.get(judge_url)
+            judge_response = self.judge.get(
+                f"/problem/{problem_id}/metadata", endpoint="/problem/<id>/metadata"
+            )
+            if judge_response.status_code == 404:
+                raise Exception(f"Problem {problem_id} not found")
             judge_response.raise_for_status()
             return judge_response.json()
         except requests.RequestException as e:
-            # If individual metadata endpoint doesn't exist, try to get it from the problems list
-            try:
-                problems_response = requests.get(f"{self.judge_base_url}/problems")
-                problems_response.raise_for_status()
-                problems_data = problems_response.json()
-
-                # Find the specific problem
-                for problem in problems_data.get("problems", []):
-                    if problem.get("id") == problem_id:
-                        return problem
-
-                raise Exception(f"Problem {problem_id} not found")
-            except requests.RequestException as fallback_error:
-                raise Exception(f"Failed to get problem metadata: {e}")
+            raise Exception(f"Failed to get problem metadata: {e}")
 
-    def health_check(self):
+    def invalidate_problem_catalogue(self):
         """
-        Health check
+        Drop the cached problem list in every backend process and reload it
+        here; returns the number of problems now cached
         """
-        return {"message": "OK"}
+        self.catalogue.invalidate()
+        try:
+            return {"problems": self.catalogue.refresh()}
+        except (requests.RequestException, KeyError) as e:
+            raise Exception(f"Failed to contact judge server: {e}")
@@ -0,0 +1,304 @@
+import itertools
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import (
+    JUDGE_ENDPOINTS,
+    JUDGE_CONNECT_TIMEOUT,
+    JUDGE_READ_TIMEOUT,
+    JUDGE_GET_RETRIES,
+    JUDGE_POOL_SIZE,
+    JUDGE_HEALTH_PATH,
+    JUDGE_HEALTH_METHOD,
+    JUDGE_HEALTH_INTERVAL,
+    JUDGE_HEALTH_TIMEOUT,
+    JUDGE_EJECT_AFTER,
+    JUDGE_BREAKER_COOLDOWN,
+)
+from utils.logger import log_info, log_warning
+
+
+class JudgeUnavailable(requests.ConnectionError):
+    """No judge node can take a request: every circuit breaker is open"""
+
+
+class JudgeNode:
+    """One Mini-Judge instance of the pool and its circuit breaker"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+        # "closed" (in use), "open" (skipped) or "half_open" (on trial)
+        self.state = "closed"
+        self.opened_at = None
+        self.trial = False
+        self.outstanding = 0
+        self.consecutive_failures = 0
+        self.requests = 0
+        self.failures = 0
+        self.last_error = None
+
+
+class JudgeClient:
+    """
+    Shared HTTP client for all Mini-Judge traffic
+
+    Keeps a pool of keep-alive connections, applies connect/read timeouts to
+    every call, retries idempotent GETs a bounded number of times and keeps
+    per-endpoint latency counters.
+
+    Requests are spread over the judge nodes in `endpoints`, each going to
+    the node with the fewest outstanding requests. Every node has a circuit
+    breaker: it opens after `eject_after` consecutive failed requests or
+    health checks, and the node is skipped. After `cooldown` seconds the
+    breaker is half-open and lets a single trial request through, which
+    closes it again on success and re-opens it on failure; a passing health
+    check closes it as well. When no node can take a request, calls fail at
+    once with JudgeUnavailable instead of waiting for a dead judge.
+    Responses carry the base URL of the node that served them in
+    `response.judge_node`.
+    """
+
+    def __init__(
+        self,
+        endpoints=JUDGE_ENDPOINTS,
+        connect_timeout=JUDGE_CONNECT_TIMEOUT,
+        read_timeout=JUDGE_READ_TIMEOUT,
+        get_retries=JUDGE_GET_RETRIES,
+        pool_size=JUDGE_POOL_SIZE,
+        health_path=JUDGE_HEALTH_PATH,
+        health_method=JUDGE_HEALTH_METHOD,
+        health_interval=JUDGE_HEALTH_INTERVAL,
+        health_timeout=JUDGE_HEALTH_TIMEOUT,
+        eject_after=JUDGE_EJECT_AFTER,
+        cooldown=JUDGE_BREAKER_COOLDOWN,
+    ):
+        self.nodes = [JudgeNode(url) for url in endpoints]
+        self.timeout = (connect_timeout, read_timeout)
+        self.health_path = health_path
+        self.health_method = health_method
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self.eject_after = eject_after
+        self.cooldown = cooldown
+        retry = Retry(
+            total=get_retries,
+            backoff_factor=0.2,
+            status_forcelist=(502, 503, 504),
+            allowed_methods=frozenset({"GET"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=len(self.nodes),
+            pool_maxsize=pool_size,
+            max_retries=retry,
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self._lock = threading.Lock()
+        self._endpoints = {}
+        # Rotates the starting node so ties are spread round-robin
+        self._turn = itertools.count()
+        self._rejected = 0
+        self._health_thread = None
+
+    @property
+    def base_url(self):
+        """Base URL of the first judge node"""
+        return self.nodes[0].base_url
+
+    def get(self, path, endpoint=None, **kwargs):
+        """GET a judge path; `endpoint` names the counter (defaults to path)"""
+        return self._request("GET", path, endpoint, **kwargs)
+
+    def post(self, path, endpoint=None, **kwargs):
+        """POST to a judge path; never retried"""
+        return self._request("POST", path, endpoint, **kwargs)
+
+    def _half_open_due(self, now):
+        """Move open breakers whose cooldown is over to half-open (holds _lock)"""
+        for node in self.nodes:
+            if node.state == "open" and now - node.opened_at >= self.cooldown:
+                node.state = "half_open"
+
+    def available(self):
+        """Whether a request would be sent to some node right now"""
+        with self._lock:
+            self._half_open_due(time.monotonic())
+            return any(
+                node.state == "closed" or (node.state == "half_open" and not node.trial)
+                for node in self.nodes
+            )
+
+    def _acquire(self):
+        """
+        Pick the node for a request and count it as outstanding, or raise
+        JudgeUnavailable
+        """
+        with self._lock:
+            self._half_open_due(time.monotonic())
+            candidates = [node for node in self.nodes if node.state == "closed"]
+            if not candidates:
+                candidates = [
+                    node
+                    for node in self.nodes
+                    if node.state == "half_open" and not node.trial
+                ][:1]
+                if not candidates:
+                    self._rejected += 1
+                    raise JudgeUnavailable("No judge node available (circuit open)")
+                candidates[0].trial = True
+            start = next(self._turn) % len(candidates)
+            rotated = candidates[start:] + candidates[:start]
+            node = min(rotated, key=lambda n: n.outstanding)
+            node.outstanding += 1
+            node.requests += 1
+            return node
+
+    def _outcome(self, node, error):
+        """
+        Update a node's breaker after a request or health check (holds _lock)
+
+        Returns the new state when it changed, else None.
+        """
+        if error is None:
+            node.consecutive_failures = 0
+            if node.state == "closed":
+                return None
+            node.state = "closed"
+            return node.state
+        node.last_error = error
+        node.consecutive_failures += 1
+        if node.state == "half_open" or (
+            node.state == "closed" and node.consecutive_failures >= self.eject_after
+        ):
+            node.state = "open"
+            node.opened_at = time.monotonic()
+            return node.state
+        return None
+
+    def _log_transition(self, node, state, error):
+        if state == "open":
+            log_warning(f"Circuit opened for judge node {node.base_url}: {error}")
+        elif state == "closed":
+            log_info(f"Circuit closed for judge node {node.base_url}")
+
+    def _release(self, node, error=None):
+        with self._lock:
+            node.outstanding -= 1
+            node.trial = False
+            if error is not None:
+                node.failures += 1
+            state = self._outcome(node, error)
+        self._log_transition(node, state, error)
+
+    def _request(self, method, path, endpoint, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        name = f"{method} {endpoint or path}"
+        node = self._acquire()
+        started = time.monotonic()
+        try:
+            response = self.session.request(method, f"{node.base_url}{path}", **kwargs)
+        except requests.RequestException as e:
+            self._record(name, time.monotonic() - started, error=True)
+            self._release(node, error=str(e))
+            raise
+        error = response.status_code >= 500
+        self._record(name, time.monotonic() - started, error=error)
+        self._release(node, error=f"HTTP {response.status_code}" if error else None)
+        response.judge_node = node.base_url
+        return response
+
+    def _record(self, name, elapsed, error):
+        with self._lock:
+            counters = self._endpoints.get(name)
+            if counters is None:
+                counters = self._endpoints[name] = {
+                    "count": 0,
+                    "errors": 0,
+                    "total_ms": 0.0,
+                    "max_ms": 0.0,
+                }
+            counters["count"] += 1
+            counters["errors"] += 1 if error else 0
+            counters["total_ms"] += elapsed * 1000
+            counters["max_ms"] = max(counters["max_ms"], elapsed * 1000)
+
+    def check_health(self, node):
+        """Probe one node, opening or closing its breaker"""
+        try:
+            response = self.session.request(
+                self.health_method,
+                f"{node.base_url}{self.health_path}",
+                timeout=self.health_timeout,
+            )
+            error = (
+                f"HTTP {response.status_code}" if response.status_code >= 500 else None
+            )
+        except requests.RequestException as e:
+            error = str(e)
+
+        with self._lock:
+            state = self._outcome(node, error)
+        self._log_transition(node, state, error)
+
+    def start(self):
+        """Start the background health checks of the judge nodes"""
+        if self._health_thread is not None:
+            return
+        self._health_thread = threading.Thread(
+            target=self._run_health_checks, name="judge-health", daemon=True
+        )
+        self._health_thread.start()
+        log_info(
+            f"Health-checking {len(self.nodes)} judge node(s) every "
+            f"{self.health_interval}s"
+        )
+
+    def _run_health_checks(self):
+        while True:
+            for node in self.nodes:
+                self.check_health(node)
+            time.sleep(self.health_interval)
+
+    def stats(self):
+        """
+        Breaker state and load per node, requests rejected by open breakers,
+        and per-endpoint call counts and latency
+        """
+        with self._lock:
+            self._half_open_due(time.monotonic())
+            states = {node.state for node in self.nodes}
+            return {
+                "breaker": {
+                    "state": next(
+                        s for s in ("closed", "half_open", "open") if s in states
+                    ),
+                    "rejected": self._rejected,
+                },
+                "nodes": [
+                    {
+                        "url": node.base_url,
+                        "state": node.state,
+                        "outstanding": node.outstanding,
+                        "requests": node.requests,
+                        "failures": node.failures,
+                        "last_error": node.last_error,
+                    }
+                    for node in self.nodes
+                ],
+                "endpoints": {
+                    name: {
+                        "count": c["count"],
+                        "errors": c["errors"],
+                        "avg_ms": round(c["total_ms"] / c["count"], 3),
+                        "max_ms": round(c["max_ms"], 3),
+                    }
+                    for name, c in self._endpoints.items()
+                },
+            }
+
+
+judge_client = JudgeClient()
@@ -0,0 +1,185 @@
+from datetime import datetime, timezone
+
+# Minutes added to a solved problem for each wrong attempt before acceptance
+PENALTY_MINUTES = 20
+
+_NEVER = datetime.max.replace(tzinfo=timezone.utc)
+
+
+def _as_utc(value):
+    """Make a naive timestamp UTC-aware"""
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value
+
+
+def summarize_submissions(submissions):
+    """
+    Fold contest_submissions rows into per user x problem cells in one pass
+
+    `submissions` must be ordered by submission_time. Returns a dict keyed by
+    (user_id, problem_id) with the same fields as contest_standing_cells:
+    attempts, penalty_attempts, score and first_accepted_time.
+    """
+    cells = {}
+    wrong_times = {}
+
+    for sub in submissions:
+        key = (sub["user_id"], str(sub["problem_id"]))
+        cell = cells.get(key)
+        if cell is None:
+            cell = cells[key] = {
+                "attempts": 0,
+                "penalty_attempts": 0,
+                "score": 0,
+                "first_accepted_time": None,
+            }
+            wrong_times[key] = []
+        cell["attempts"] += 1
+
+        submission_time = sub["submission_time"]
+        if sub["is_accepted"]:
+            if cell["first_accepted_time"] is None:
+                cell["first_accepted_time"] = submission_time
+                cell["score"] += sub["score"] or 0
+            elif submission_time == cell["first_accepted_time"]:
+                cell["score"] += sub["score"] or 0
+        elif cell["first_accepted_time"] is None:
+            wrong_times[key].append(submission_time)
+
+    for key, cell in cells.items():
+        if cell["first_accepted_time"] is not None:
+            cell["penalty_attempts"] = sum(
+                1 for t in wrong_times[key] if t < cell["first_accepted_time"]
+            )
+
+    return cells
+
+
+def rank_standings(participants, cells):
+    """
+    Aggregate cells into per-user standings, ordered by rank
+
+    Ordering matches contest_standings reads: problems solved, penalty,
+    first solve time, then score.
+    """
+    user_cells = {}
+    for (user_id, _), cell in cells.items():
+        user_cells.setdefault(user_id, []).append(cell)
+
+    standings = []
+    for participant in participants:
+        user_id = participant["user_id"]
+        solved = [c for c in user_cells.get(user_id, []) if c["first_accepted_time"]]
+        standings.append(
+            {
+                "user_id": user_id,
+                "username": participant["username"],
+                "problems_solved": len(solved),
+                "total_score": sum(c["score"] for c in solved),
+                "total_penalty": sum(c["penalty_attempts"] for c in solved)
+                * PENALTY_MINUTES,
+                "first_solve_time": min(
+                    (c["first_accepted_time"] for c in solved), default=None
+                ),
+            }
+        )
+
+    standings.sort(
+        key=lambda x: (
+            -x["problems_solved"],
+            x["total_penalty"],
+            _as_utc(x["first_solve_time"]) or _NEVER,
+            -x["total_score"],
+        )
+    )
+    return standings
+
+
+def find_first_blood(cells):
+    """Map each problem_id to the user who solved it first"""
+    first = {}
+    for (user_id, problem_id), cell in cells.items():
+        solved_at = cell["first_accepted_time"]
+        if solved_at is None:
+            continue
+        best = first.get(problem_id)
+        if best is None or (_as_utc(solved_at), user_id) < best:
+            first[problem_id] = (_as_utc(solved_at), user_id)
+    return {problem_id: user_id for problem_id, (_, user_id) in first.items()}
+
+
+def build_leaderboard(contest, standings, cells, pending):
+    """
+    Attach rank and per-problem status cells to ordered standings
+
+    Args:
+        contest: contest row with `start_time` and `problems`
+        standings: per-user aggregates already ordered by rank
+        cells: dict keyed by (user_id, problem_id) as built by
+            `summarize_submissions` or read from contest_standing_cells
+        pending: set of (user_id, problem_id) pairs with a pending submission
+
+    `first_solve_time` is left as a raw timestamp for the caller to format.
+    """
+    first_blood = find_first_blood(cells)
+    contest_start = _as_utc(contest["start_time"])
+    problems = contest["problems"] or []
+
+    entries = []
+    for rank, standing in enumerate(standings, start=1):
+        user_id = standing["user_id"]
+        problem_statuses = {}
+        for problem_id in problems:
+            cell = cells.get((user_id, str(problem_id)))
+            is_pending = (user_id, str(problem_id)) in pending
+
+            if cell is None:
+                problem_statuses[problem_id] = {
+                    "status": "pending" if is_pending else "untried",
+                    "attempts": 0,
+                    "solve_time": None,
+                    "is_first_blood": False,
+                }
+            elif cell["first_accepted_time"] is not None:
+                solve_time = _as_utc(cell["first_accepted_time"])
+                problem_statuses[problem_id] = {
+                    "status": "solved",
+                    "attempts": cell["attempts"],
+                    "penalty_attempts": cell["penalty_attempts"],
+                    "solve_time": int(
+                        (solve_time - contest_start).total_seconds() / 60
+                    ),
+                    "is_first_blood": first_blood.get(str(problem_id)) == user_id,
+                }
+            else:
+                problem_statuses[problem_id] = {
+                    "status": "pending" if is_pending else "attempted",
+                    "attempts": cell["attempts"],
+                    "solve_time": None,
+                    "is_first_blood": False,
+                }
+
+        entries.append(
+            {
+                "rank": rank,
+                "user_id": user_id,
+                "username": standing["username"],
+                "problems_solved": standing["problems_solved"],
+                "total_score": standing["total_score"],
+                "total_penalty": standing["total_penalty"],
+                "first_solve_time": standing["first_solve_time"],
+                "problem_statuses": problem_statuses,
+            }
+        )
+
+    return entries
+
+
+def build_leaderboard_from_history(contest, participants, submissions, pending):
+    """
+    Full leaderboard computation straight from a contest's submission history
+    """
+    cells = summarize_submissions(submissions)
+    standings = rank_standings(participants, cells)
+    return build_leaderboard(contest, standings, cells, pending)
@@ -0,0 +1,269 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from datetime import datetime, timezone
+from config import LEADERBOARD_FEED_HISTORY
+from services.connection import release_connection
+from services.contest import ContestService
+from services.notifier import Notifier
+
+
+class _ContestFeed:
+    """Last leaderboard snapshot of one contest and the deltas leading to it"""
+
+    def __init__(self, history):
+        self.lock = threading.Lock()
+        self.version = None
+        self.contest = None
+        self.rows = {}
+        self.events = deque(maxlen=history)
+        self.dirty = True
+        self.subscribers = 0
+        self.ends_at = None
+
+
+def diff_leaderboard(old_rows, new_rows):
+    """
+    Changed rows between two leaderboards keyed by user_id
+
+    A changed row carries its user_id, the top-level fields that changed
+    (rank, problems_solved, ...) and only the changed problem_statuses cells.
+    Users new to the board are sent whole. Returns (rows, removed_user_ids).
+    """
+    changed = []
+    for user_id, row in new_rows.items():
+        old = old_rows.get(user_id)
+        if old is None:
+            changed.append(row)
+            continue
+
+        delta = {
+            key: value
+            for key, value in row.items()
+            if key != "problem_statuses" and old.get(key) != value
+        }
+        cells = {
+            problem_id: cell
+            for problem_id, cell in row["problem_statuses"].items()
+            if old["problem_statuses"].get(problem_id) != cell
+        }
+        if cells:
+            delta["problem_statuses"] = cells
+        if delta:
+            delta["user_id"] = user_id
+            changed.append(delta)
+
+    removed = [user_id for user_id in old_rows if user_id not in new_rows]
+    return changed, removed
+
+
+class LeaderboardFeed:
+    """
+    Versioned per-contest stream of leaderboard deltas
+
+    `publish(contest_id)` announces that a contest's standings changed (through
+    a Notifier, so it reaches every backend process). Streams watching the
+    contest recompute the board once per change and read the resulting
+    delta events; contests nobody watches are never recomputed. A contest's
+    feed is dropped once no stream watches it and the contest has ended (or
+    does not exist).
+
+    Versions come from one process-wide counter seeded with the start time in
+    milliseconds, so they only increase, even across restarts. A stream resumes
+    from any version still in the contest's history; otherwise it gets a
+    fresh snapshot.
+    """
+
+    def __init__(self, history=LEADERBOARD_FEED_HISTORY):
+        self.history = history
+        self.contest_service = ContestService()
+        self.notifier = Notifier("leaderboard_update")
+        self.notifier.add_callback(self._mark_dirty)
+        self._lock = threading.Lock()
+        self._feeds = {}
+        self._versions = itertools.count(int(time.time() * 1000))
+
+    def _feed(self, contest_id, retain=False):
+        with self._lock:
+            feed = self._feeds.get(str(contest_id))
+            if feed is None:
+                self._prune()
+                feed = self._feeds[str(contest_id)] = _ContestFeed(self.history)
+            if retain:
+                feed.subscribers += 1
+            return feed
+
+    def _prune(self):
+        """Drop unwatched feeds of ended or unknown contests; hold _lock"""
+        now = datetime.now(timezone.utc)
+        for key, feed in list(self._feeds.items()):
+            if feed.subscribers == 0 and (feed.ends_at is None or feed.ends_at <= now):
+                del self._feeds[key]
+
+    def _release(self, feed):
+        with self._lock:
+            feed.subscribers -= 1
+            self._prune()
+
+    def _mark_dirty(self, key):
+        with self._lock:
+            feed = self._feeds.get(key)
+        if feed is not None:
+            feed.dirty = True
+
+    def publish(self, contest_id):
+        """Announce a committed standings change for `contest_id`"""
+        self.notifier.publish(contest_id)
+
+    def notify(self, cursor, contest_id):
+        """Announce a standings change within the transaction of `cursor`"""
+        self.notifier.notify(cursor, contest_id)
+
+    def committed(self, contest_id):
+        """Deliver a change announced with `notify` after its commit"""
+        self.notifier.committed(contest_id)
+
+    def subscribe(self, contest_id):
+        """Returns an Event set whenever `contest_id` is published"""
+        return self.notifier.subscribe(contest_id)
+
+    def unsubscribe(self, contest_id, event):
+        self.notifier.unsubscribe(contest_id, event)
+
+    def refresh(self, contest_id):
+        """
+        Recompute the board if it changed since the last refresh and record
+        the delta as a new event
+
+        Returns False if the contest does not exist. The database connection
+        borrowed for the recomputation is released before returning, as
+        streams hold their thread for a long time.
+        """
+        return self._refresh(self._feed(contest_id), contest_id)
+
+    def _refresh(self, feed, contest_id):
+        with feed.lock:
+            if not feed.dirty:
+                return True
+            feed.dirty = False
+            try:
+                board = self.contest_service.get_contest_leaderboard(contest_id)
+            except Exception:
+                feed.dirty = True
+                raise
+            finally:
+                release_connection()
+
+            if board is None:
+                return False
+            feed.ends_at = datetime.fromisoformat(
+                board["contest"]["end_time"]["utc_iso"]
+            )
+
+            rows = {row["user_id"]: row for row in board["leaderboard"]}
+            if feed.version is not None and board["contest"] == feed.contest:
+                changed, removed = diff_leaderboard(feed.rows, rows)
+                if not changed and not removed:
+                    return True
+                version = next(self._versions)
+                feed.events.append(
+                    {
+                        "version": version,
+                        "base": feed.version,
+                        "rows": changed,
+                        "removed": removed,
+                    }
+                )
+            else:
+                # First load or the contest itself changed: streams need a
+                # new snapshot
+                feed.events.clear()
+                version = next(self._versions)
+            feed.version = version
+            feed.contest = board["contest"]
+            feed.rows = rows
+            return True
+
+    def snapshot(self, contest_id):
+        """
+        Current version and full leaderboard, or None if the contest does not
+        exist
+        """
+        return self._snapshot(self._feed(contest_id), contest_id)
+
+    def _snapshot(self, feed, contest_id):
+        if not self._refresh(feed, contest_id):
+            return None
+        with feed.lock:
+            return {
+                "version": feed.version,
+                "contest": feed.contest,
+                "leaderboard": sorted(feed.rows.values(), key=lambda r: r["rank"]),
+            }
+
+    def events_since(self, contest_id, version):
+        """
+        Delta events after `version`, or None if `version` is no longer (or
+        was never) in the contest's history and a snapshot is needed
+        """
+        return self._events_since(self._feed(contest_id), version)
+
+    def _events_since(self, feed, version):
+        with feed.lock:
+            if version == feed.version:
+                return []
+            events = list(feed.events)
+        for i, event in enumerate(events):
+            if event["base"] == version:
+                return events[i:]
+        return None
+
+    def stream(self, contest_id, since=None, keepalive=15):
+        """
+        Generate Server-Sent Events for a contest's leaderboard
+
+        Starts with the deltas after `since` when it can be resumed from,
+        else with a snapshot; then sends a "delta" event per change and a
+        keep-alive comment every `keepalive` idle seconds.
+        """
+        event = self.subscribe(contest_id)
+        feed = self._feed(contest_id, retain=True)
+        try:
+            version = since
+            while True:
+                # Cleared before refreshing: a publish arriving meanwhile
+                # marks the feed dirty first and is picked up next round
+                event.clear()
+                if not self._refresh(feed, contest_id):
+                    return
+                events = (
+                    self._events_since(feed, version) if version is not None else None
+                )
+                if events is None:
+                    snapshot = self._snapshot(feed, contest_id)
+                    if snapshot is None:
+                        return
+                    version = snapshot["version"]
+                    yield _sse("snapshot", version, snapshot)
+                for delta in events or ():
+                    version = delta["version"]
+                    yield _sse("delta", version, delta)
+
+                if not event.wait(keepalive):
+                    yield ": keep-alive\n\n"
+        finally:
+            self._release(feed)
+            self.unsubscribe(contest_id, event)
+
+    def start(self):
+        """Start listening for changes published by other processes"""
+        self.notifier.start()
+
+
+def _sse(event, version, data):
+    return f"id: {version}\nevent: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+leaderboard_feed = LeaderboardFeed()
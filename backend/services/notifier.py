@@ -0,0 +1,138 @@
+import select
+import threading
+import time
+import psycopg2
+from config import (
+    DB_HOST,
+    DB_PORT,
+    DB_NAME,
+    DB_USER,
+    DB_PASSWORD,
+    NOTIFY_BACKEND,
+)
+from services.connection import get_connection
+from utils.logger import log_error, log_info
+
+
+class Notifier:
+    """
+    Wakes threads waiting for an event on a key (e.g. a submission id)
+
+    With the "local" backend events only reach waiters in this process. With
+    the "postgres" backend events are sent through NOTIFY on `channel` and a
+    listener thread in every backend process wakes its local waiters, so
+    several workers can serve waiters for the same key.
+    """
+
+    def __init__(self, channel, backend=NOTIFY_BACKEND):
+        self.channel = channel
+        self.backend = backend
+        self._lock = threading.Lock()
+        self._waiters = {}
+        self._callbacks = []
+        self._listener = None
+
+    def add_callback(self, callback):
+        """Call `callback(key)` for every event received by this process"""
+        self._callbacks.append(callback)
+
+    def subscribe(self, key):
+        """Register interest in `key`; returns an Event set on publish"""
+        event = threading.Event()
+        with self._lock:
+            self._waiters.setdefault(str(key), []).append(event)
+        return event
+
+    def unsubscribe(self, key, event):
+        """Drop a waiter registered with `subscribe`"""
+        with self._lock:
+            waiters = self._waiters.get(str(key))
+            if waiters and event in waiters:
+                waiters.remove(event)
+                if not waiters:
+                    del self._waiters[str(key)]
+
+    def wait(self, key, timeout):
+        """Block until `key` is published or `timeout` seconds pass"""
+        event = self.subscribe(key)
+        try:
+            return event.wait(timeout)
+        finally:
+            self.unsubscribe(key, event)
+
+    def notify(self, cursor, key):
+        """
+        Announce an event for `key` as part of the open transaction of
+        `cursor`; call `committed(key)` once it was committed
+
+        With the postgres backend the NOTIFY is sent on `cursor` and only
+        delivered on commit, so callers holding a connection don't check out
+        a second one to publish.
+        """
+        if self.backend == "postgres":
+            cursor.execute("SELECT pg_notify(%s, %s)", (self.channel, str(key)))
+
+    def committed(self, key):
+        """Deliver an event announced with `notify` after its commit"""
+        if self.backend != "postgres":
+            self._wake(str(key))
+
+    def publish(self, key):
+        """
+        Announce an event for `key`; call after the change was committed
+        """
+        if self.backend == "postgres":
+            with get_connection() as conn:
+                self.notify(conn.cursor(), key)
+                conn.commit()
+        self.committed(key)
+
+    def _wake(self, key):
+        for callback in self._callbacks:
+            callback(key)
+        with self._lock:
+            waiters = list(self._waiters.get(key, ()))
+        for event in waiters:
+            event.set()
+
+    def start(self):
+        """Start the LISTEN thread when using the postgres backend"""
+        if self.backend != "postgres" or self._listener is not None:
+            return
+        self._listener = threading.Thread(
+            target=self._listen, name=f"listen-{self.channel}", daemon=True
+        )
+        self._listener.start()
+        log_info(f"Listening for '{self.channel}' notifications")
+
+    def _listen(self):
+        while True:
+            conn = None
+            try:
+                # A dedicated connection: it stays in LISTEN for the process
+                # lifetime and must not hold a pool slot
+                conn = psycopg2.connect(
+                    host=DB_HOST,
+                    port=DB_PORT,
+                    database=DB_NAME,
+                    user=DB_USER,
+                    password=DB_PASSWORD,
+                )
+                conn.autocommit = True
+                conn.cursor().execute(f"LISTEN {self.channel}")
+
+                while True:
+                    if select.select([conn], [], [], 5) == ([], [], []):
+                        continue
+                    conn.poll()
+                    while conn.notifies:
+                        self._wake(conn.notifies.pop(0).payload)
+            except Exception as e:
+                log_error(f"Notification listener for '{self.channel}' failed: {e}")
+                time.sleep(1)
+            finally:
+                if conn is not None and not conn.closed:
+                    conn.close()
+
+
+verdict_notifier = Notifier("submission_verdict")
@@ -0,0 +1,171 @@
+import hashlib
+import json
+import threading
+import time
+import requests
+from config import PROBLEM_CATALOGUE_TTL, PROBLEM_CATALOGUE_RETRY
+from services.judge_client import judge_client
+from services.notifier import Notifier
+from utils.logger import log_error
+
+
+class ProblemCatalogue:
+    """
+    In-process cache of the judge's problem list, indexed by problem id
+
+    The first read loads the list from the judge. After `ttl` seconds reads
+    keep returning the cached list while one background thread reloads it
+    (stale-while-revalidate). If the judge is slow or down the stale list is
+    kept and served, and the reload is retried every `retry` seconds.
+
+    `invalidate()` expires the cache in every backend process (through a
+    Notifier); each reloads it on its next read.
+    """
+
+    def __init__(
+        self,
+        judge=judge_client,
+        ttl=PROBLEM_CATALOGUE_TTL,
+        retry=PROBLEM_CATALOGUE_RETRY,
+    ):
+        self.judge = judge
+        self.ttl = ttl
+        self.retry = retry
+        self.notifier = Notifier("problem_catalogue")
+        self.notifier.add_callback(lambda key: self.expire())
+        self._lock = threading.Lock()
+        # Held by whoever is reloading, so only one reload runs at a time
+        self._reload_lock = threading.Lock()
+        self._problems = None
+        self._by_id = {}
+        self._loaded_at = None
+        self._next_reload = 0.0
+        self._last_error = None
+
+    def _reload(self):
+        """Fetch the problem list from the judge (the caller holds _reload_lock)"""
+        try:
+            response = self.judge.get("/problems")
+            response.raise_for_status()
+            problems = response.json()["problems"]
+        except (requests.RequestException, KeyError) as e:
+            with self._lock:
+                self._next_reload = time.monotonic() + self.retry
+                self._last_error = str(e)
+            log_error(f"Problem catalogue reload failed: {e}")
+            raise
+
+        by_id = {str(problem.get("id")): problem for problem in problems}
+        with self._lock:
+            self._problems = problems
+            self._by_id = by_id
+            self._loaded_at = time.monotonic()
+            self._next_reload = self._loaded_at + self.ttl
+            self._last_error = None
+        return len(problems)
+
+    def _reload_in_background(self):
+        try:
+            self._reload()
+        except (requests.RequestException, KeyError):
+            pass  # Already logged; the stale list keeps being served
+        finally:
+            self._reload_lock.release()
+
+    def _current(self, wait=True):
+        """
+        (problems, by_id), loading them on first use and starting a
+        background reload once they are stale
+
+        With `wait=False` a catalogue that was never loaded is loaded in the
+        background instead, and (None, {}) is returned meanwhile.
+        """
+        with self._lock:
+            problems, by_id = self._problems, self._by_id
+            due = time.monotonic() >= self._next_reload
+
+        if problems is None and wait:
+            # Nothing to serve yet: wait for the judge
+            with self._reload_lock:
+                if self._problems is None:
+                    self._reload()
+            with self._lock:
+                return self._problems, self._by_id
+
+        if due and self._reload_lock.acquire(blocking=False):
+            threading.Thread(
+                target=self._reload_in_background,
+                name="problem-catalogue-reload",
+                daemon=True,
+            ).start()
+        return problems, by_id
+
+    def problems(self):
+        """All problems, as listed by the judge"""
+        return self._current()[0]
+
+    def problem(self, problem_id):
+        """The list entry of one problem, or None if the judge has no such problem"""
+        return self._current()[1].get(str(problem_id))
+
+    def find(self, problem_ids):
+        """
+        The list entries of `problem_ids`, in that order, or None if one of
+        them is not in the catalogue
+        """
+        by_id = self._current()[1]
+        entries = [by_id.get(str(problem_id)) for problem_id in problem_ids]
+        return None if None in entries else entries
+
+    def version(self, problem_id, wait=True):
+        """
+        A version string of a problem: the judge's "version" field when it
+        reports one, else a digest of the problem's list entry (so changed
+        limits count as a new version). None when the problem is unknown or
+        the judge can't be reached, or with `wait=False` while the catalogue
+        is still loading.
+        """
+        try:
+            entry = self._current(wait)[1].get(str(problem_id))
+        except (requests.RequestException, KeyError):
+            return None
+        if entry is None:
+            return None
+        if entry.get("version") is not None:
+            return str(entry["version"])[:64]
+        canonical = json.dumps(entry, sort_keys=True, default=str)
+        return hashlib.sha256(canonical.encode()).hexdigest()[:32]
+
+    def refresh(self):
+        """Reload the catalogue now; returns the number of problems"""
+        with self._reload_lock:
+            return self._reload()
+
+    def expire(self):
+        """Reload on the next read (the current list is served meanwhile)"""
+        with self._lock:
+            self._next_reload = 0.0
+
+    def invalidate(self):
+        """Expire the catalogue in every backend process"""
+        self.notifier.publish("invalidate")
+
+    def start(self):
+        """Start listening for invalidations from other processes"""
+        self.notifier.start()
+
+    def stats(self):
+        """Cached problem count, age and last reload error"""
+        with self._lock:
+            return {
+                "problems": len(self._problems) if self._problems is not None else None,
+                "age_seconds": (
+                    round(time.monotonic() - self._loaded_at, 3)
+                    if self._loaded_at is not None
+                    else None
+                ),
+                "last_error": self._last_error,
+            }
+
+
+problem_catalogue = ProblemCatalogue()
@@ -0,0 +1,228 @@
+import math
+import threading
+import time
+from psycopg2 import extras
+from config import (
+    SUBMISSION_RATE_LIMIT_BACKEND,
+    SUBMISSION_RATE_BURST,
+    SUBMISSION_RATE_PER_MINUTE,
+    SUBMISSION_MAX_IN_PROGRESS,
+)
+from services.connection import get_connection
+
+# Seconds clients are asked to wait when too many submissions are in progress
+OVERLOADED_RETRY_AFTER = 10
+
+
+class RateLimited(Exception):
+    """A submission was refused; retry after `retry_after` seconds"""
+
+    status_code = 429
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class Overloaded(RateLimited):
+    """Too many submissions are waiting for a verdict"""
+
+    status_code = 503
+
+
+class LocalTokenBuckets:
+    """Token buckets kept in this process (one backend process only)"""
+
+    name = "local"
+
+    def __init__(self, max_keys=100000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        self._buckets = {}
+
+    def take(self, key, burst, rate, cursor=None):
+        """
+        Take a token from `key`'s bucket (`burst` tokens, refilled at `rate`
+        tokens per second); returns 0 or the seconds until one is available
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated_at, _, _ = self._buckets.get(key, (burst, now, 0, 0))
+            tokens = min(burst, tokens + (now - updated_at) * rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, burst, rate)
+                return (1 - tokens) / rate
+            self._buckets[key] = (tokens - 1, now, burst, rate)
+            if len(self._buckets) > self.max_keys:
+                self._prune(now)
+            return 0
+
+    def _prune(self, now):
+        """
+        Forget buckets that have refilled completely, each by its own burst
+        and rate (holds _lock)
+        """
+        for key, (tokens, updated_at, burst, rate) in list(self._buckets.items()):
+            if tokens + (now - updated_at) * rate >= burst:
+                del self._buckets[key]
+
+
+class PostgresTokenBuckets:
+    """
+    Token buckets in the rate_limit_buckets table, shared by every backend
+    process
+
+    The token is taken in the caller's transaction, so it is given back if
+    the submission is rolled back; the row lock also serializes concurrent
+    submissions of one user.
+    """
+
+    name = "postgres"
+
+    def take(self, key, burst, rate, cursor):
+        """
+        Take a token from `key`'s bucket (`burst` tokens, refilled at `rate`
+        tokens per second); returns 0 or the seconds until one is available
+        """
+        params = {"key": key, "burst": burst, "rate": rate}
+        cursor.execute(
+            """
+            INSERT INTO rate_limit_buckets AS b (key, tokens, updated_at)
+            VALUES (%(key)s, %(burst)s - 1, clock_timestamp())
+            ON CONFLICT (key) DO UPDATE
+            SET tokens = LEAST(
+                    %(burst)s,
+                    b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at)
+                        * %(rate)s
+                ) - 1,
+                updated_at = clock_timestamp()
+            WHERE LEAST(
+                %(burst)s,
+                b.tokens + EXTRACT(EPOCH FROM clock_timestamp() - b.updated_at)
+                    * %(rate)s
+            ) >= 1
+            RETURNING tokens
+        """,
+            params,
+        )
+        if cursor.fetchone():
+            return 0
+
+        cursor.execute(
+            """
+            SELECT LEAST(
+                %(burst)s,
+                tokens + EXTRACT(EPOCH FROM clock_timestamp() - updated_at)
+                    * %(rate)s
+            ) AS tokens
+            FROM rate_limit_buckets WHERE key = %(key)s
+        """,
+            params,
+        )
+        return (1 - float(cursor.fetchone()["tokens"])) / rate
+
+
+class SubmissionRateLimiter:
+    """
+    Admission control for /submission/submit
+
+    Each user has a token bucket per contest (and one for practice): a
+    submission takes a token, buckets hold at most `burst` tokens and refill
+    at `per_minute` tokens a minute. Contests can override both. When
+    `max_in_progress` is set, submissions are also refused while that many
+    submissions are waiting for a verdict.
+    """
+
+    def __init__(
+        self,
+        backend=SUBMISSION_RATE_LIMIT_BACKEND,
+        burst=SUBMISSION_RATE_BURST,
+        per_minute=SUBMISSION_RATE_PER_MINUTE,
+        max_in_progress=SUBMISSION_MAX_IN_PROGRESS,
+    ):
+        self.buckets = (
+            PostgresTokenBuckets() if backend == "postgres" else LocalTokenBuckets()
+        )
+        self.burst = burst
+        self.per_minute = per_minute
+        self.max_in_progress = max_in_progress
+        self._lock = threading.Lock()
+        self._admitted = 0
+        self._limited = 0
+        self._overloaded = 0
+
+    def admit(self, cursor, user_id, contest=None):
+        """
+        Take a submission token for `user_id`, or raise RateLimited (or
+        Overloaded when too many submissions are in progress)
+
+        `contest` is the contest the submission is made in (a row with id,
+        submission_burst and submission_rate_per_minute), if any.
+        """
+        burst, per_minute = self.burst, self.per_minute
+        if contest is not None:
+            if contest["submission_burst"] is not None:
+                burst = contest["submission_burst"]
+            if contest["submission_rate_per_minute"] is not None:
+                per_minute = contest["submission_rate_per_minute"]
+
+        if self.max_in_progress:
+            cursor.execute(
+                """
+                SELECT COUNT(*) AS waiting FROM (
+                    SELECT 1 FROM submissions
+                    WHERE status IN ('pending', 'queued', 'processing')
+                    LIMIT %s
+                ) w
+            """,
+                (self.max_in_progress,),
+            )
+            if cursor.fetchone()["waiting"] >= self.max_in_progress:
+                with self._lock:
+                    self._overloaded += 1
+                raise Overloaded(
+                    "The judge is overloaded, try again shortly",
+                    OVERLOADED_RETRY_AFTER,
+                )
+
+        key = f"{user_id}:{contest['id'] if contest is not None else 'practice'}"
+        wait = self.buckets.take(key, burst, per_minute / 60, cursor)
+        if wait:
+            with self._lock:
+                self._limited += 1
+            raise RateLimited("Too many submissions, slow down", wait)
+
+        with self._lock:
+            self._admitted += 1
+
+    def stats(self):
+        """
+        Admission counters of this process, and the submissions waiting in
+        the dispatch queue or at the judge across all processes
+        """
+        with get_connection() as conn:
+            cursor = conn.cursor(cursor_factory=extras.RealDictCursor)
+            cursor.execute(
+                """
+                SELECT
+                    (SELECT COUNT(*) FROM judge_dispatch_queue) AS queue_depth,
+                    (SELECT COUNT(*) FROM submissions
+                     WHERE status IN ('pending', 'queued', 'processing'))
+                        AS in_progress
+            """
+            )
+            counts = cursor.fetchone()
+            conn.rollback()
+
+        with self._lock:
+            return {
+                "backend": self.buckets.name,
+                "queue_depth": counts["queue_depth"],
+                "in_flight": max(0, counts["in_progress"] - counts["queue_depth"]),
+                "admitted": self._admitted,
+                "limited": self._limited,
+                "overloaded": self._overloaded,
+            }
+
+
+submission_rate_limiter = SubmissionRateLimiter()
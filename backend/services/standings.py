@@ -0,0 +1,240 @@
+from services.connection import DatabaseService
+from services.leaderboard import PENALTY_MINUTES
+
+# Recompute contest_standing_cells from contest_submissions for the rows
+# matched by {condition}. Cells are recomputed rather than patched so that
+# verdicts arriving out of submission order still yield the right penalty.
+_CELL_UPSERT = """
+    INSERT INTO contest_standing_cells
+    (contest_id, user_id, problem_id, attempts, penalty_attempts,
+     score, first_accepted_time)
+    SELECT
+        contest_id,
+        user_id,
+        problem_id,
+        COUNT(*),
+        COUNT(*) FILTER (
+            WHERE is_accepted IS NOT TRUE AND submission_time < first_accepted
+        ),
+        COALESCE(SUM(score) FILTER (
+            WHERE is_accepted AND submission_time = first_accepted
+        ), 0),
+        MIN(first_accepted)
+    FROM (
+        SELECT
+            contest_id, user_id, problem_id, is_accepted, score, submission_time,
+            MIN(submission_time) FILTER (WHERE is_accepted) OVER (
+                PARTITION BY contest_id, user_id, problem_id
+            ) AS first_accepted
+        FROM contest_submissions
+        WHERE {condition}
+    ) history
+    GROUP BY contest_id, user_id, problem_id
+    ON CONFLICT (contest_id, user_id, problem_id) DO UPDATE SET
+        attempts = EXCLUDED.attempts,
+        penalty_attempts = EXCLUDED.penalty_attempts,
+        score = EXCLUDED.score,
+        first_accepted_time = EXCLUDED.first_accepted_time,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Re-aggregate contest_standings from the cells matched by {condition}
+_STANDING_UPSERT = """
+    INSERT INTO contest_standings
+    (contest_id, user_id, problems_solved, total_score, total_penalty,
+     first_solve_time)
+    SELECT
+        contest_id,
+        user_id,
+        COUNT(first_accepted_time),
+        COALESCE(SUM(score) FILTER (WHERE first_accepted_time IS NOT NULL), 0),
+        COALESCE(
+            SUM(penalty_attempts) FILTER (WHERE first_accepted_time IS NOT NULL),
+            0
+        ) * %(penalty_minutes)s,
+        MIN(first_accepted_time)
+    FROM contest_standing_cells
+    WHERE {condition}
+    GROUP BY contest_id, user_id
+    ON CONFLICT (contest_id, user_id) DO UPDATE SET
+        problems_solved = EXCLUDED.problems_solved,
+        total_score = EXCLUDED.total_score,
+        total_penalty = EXCLUDED.total_penalty,
+        first_solve_time = EXCLUDED.first_solve_time,
+        updated_at = CURRENT_TIMESTAMP
+"""
+
+# Refresh every standing touched by the contest_submissions rows of the
+# submissions in %(submission_ids)s, as one multi-statement batch. Standing
+# rows are locked first, in a fixed order, as in refresh_cell.
+REFRESH_FOR_SUBMISSIONS = (
+    """
+    INSERT INTO contest_standings (contest_id, user_id)
+    SELECT DISTINCT contest_id, user_id
+    FROM contest_submissions
+    WHERE submission_id = ANY(%(submission_ids)s)
+    ORDER BY contest_id, user_id
+    ON CONFLICT (contest_id, user_id) DO UPDATE
+    SET updated_at = CURRENT_TIMESTAMP;
+"""
+    + _CELL_UPSERT.format(
+        condition="(contest_id, user_id, problem_id) IN ("
+        "SELECT contest_id, user_id, problem_id FROM contest_submissions "
+        "WHERE submission_id = ANY(%(submission_ids)s))"
+    )
+    + ";"
+    + _STANDING_UPSERT.format(
+        condition="(contest_id, user_id) IN ("
+        "SELECT contest_id, user_id FROM contest_submissions "
+        "WHERE submission_id = ANY(%(submission_ids)s))"
+    )
+    + ";"
+)
+
+
+class StandingsService(DatabaseService):
+    """
+    Incrementally maintained contest standings
+
+    `contest_standings` holds one aggregate row per user and
+    `contest_standing_cells` one row per user x problem. Both are derived
+    from contest_submissions and can always be rebuilt from it.
+    """
+
+    def refresh_cell(self, contest_id, user_id, problem_id):
+        """
+        Update the standings after a contest submission was recorded
+
+        Runs inside the caller's transaction; the caller commits.
+        """
+        params = {
+            "contest_id": contest_id,
+            "user_id": user_id,
+            "problem_id": problem_id,
+            "penalty_minutes": PENALTY_MINUTES,
+        }
+        # Lock the user's standing row first so concurrent verdicts for the
+        # same user are applied one after another, each seeing the other's
+        # committed contest_submissions rows
+        self.cursor.execute(
+            """
+            INSERT INTO contest_standings (contest_id, user_id)
+            VALUES (%(contest_id)s, %(user_id)s)
+            ON CONFLICT (contest_id, user_id) DO UPDATE
+            SET updated_at = CURRENT_TIMESTAMP
+        """,
+            params,
+        )
+        self.cursor.execute(
+            _CELL_UPSERT.format(
+                condition="contest_id = %(contest_id)s "
+                "AND user_id = %(user_id)s AND problem_id = %(problem_id)s"
+            ),
+            params,
+        )
+        self.cursor.execute(
+            _STANDING_UPSERT.format(
+                condition="contest_id = %(contest_id)s AND user_id = %(user_id)s"
+            ),
+            params,
+        )
+
+    def bump_version(self, contest_id):
+        """
+        Mark a contest's leaderboard as changed (the caller commits)
+
+        Run it last in the transaction: it locks the contest row until commit.
+        """
+        self.cursor.execute(
+            "UPDATE contests SET version = version + 1 WHERE id = %s", (contest_id,)
+        )
+
+    def bump_pending_versions(self, user_id, problem_id, cursor=None):
+        """
+        Mark as changed every contest whose leaderboard shows the user's
+        pending flag for a problem (the caller commits)
+
+        The contest rows are locked in id order, like the callback path's
+        version bump, so the two can't deadlock.
+        """
+        (cursor or self.cursor).execute(
+            """
+            UPDATE contests SET version = version + 1
+            WHERE id IN (
+                SELECT id FROM contests
+                WHERE id IN (
+                    SELECT cp.contest_id
+                    FROM contest_participants cp
+                    JOIN contest_problems p ON p.contest_id = cp.contest_id
+                    WHERE cp.user_id = %s AND p.problem_id = %s
+                )
+                ORDER BY id
+                FOR UPDATE
+            )
+        """,
+            (user_id, str(problem_id)),
+        )
+
+    def rebuild(self, contest_id):
+        """Rebuild a contest's standings from scratch"""
+        params = {"contest_id": contest_id, "penalty_minutes": PENALTY_MINUTES}
+        try:
+            self.cursor.execute(
+                "DELETE FROM contest_standings WHERE contest_id = %(contest_id)s",
+                params,
+            )
+            self.cursor.execute(
+                "DELETE FROM contest_standing_cells WHERE contest_id = %(contest_id)s",
+                params,
+            )
+            self.cursor.execute(
+                _CELL_UPSERT.format(condition="contest_id = %(contest_id)s"), params
+            )
+            self.cursor.execute(
+                _STANDING_UPSERT.format(condition="contest_id = %(contest_id)s"),
+                params,
+            )
+            self.bump_version(contest_id)
+            self.conn.commit()
+        except Exception as e:
+            self.conn.rollback()
+            raise e
+
+    def get_standings(self, contest_id):
+        """
+        Get ranked standings for every registered user, plus their cells
+        """
+        self.cursor.execute(
+            """
+            SELECT
+                u.id as user_id,
+                u.username,
+                COALESCE(st.problems_solved, 0) as problems_solved,
+                COALESCE(st.total_score, 0) as total_score,
+                COALESCE(st.total_penalty, 0) as total_penalty,
+                st.first_solve_time
+            FROM contest_participants cp
+            JOIN users u ON u.id = cp.user_id
+            LEFT JOIN contest_standings st
+                ON st.contest_id = cp.contest_id AND st.user_id = cp.user_id
+            WHERE cp.contest_id = %s
+            ORDER BY problems_solved DESC, total_penalty ASC,
+                     first_solve_time ASC NULLS LAST, total_score DESC, u.id ASC
+        """,
+            (contest_id,),
+        )
+        standings = self.cursor.fetchall()
+
+        self.cursor.execute(
+            """
+            SELECT user_id, problem_id, attempts, penalty_attempts, score,
+                   first_accepted_time
+            FROM contest_standing_cells
+            WHERE contest_id = %s
+        """,
+            (contest_id,),
+        )
+        cells = {
+            (row["user_id"], row["problem_id"]): row for row in self.cursor.fetchall()
+        }
+        return standings, cells
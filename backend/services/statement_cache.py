@@ -0,0 +1,188 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+import requests
+from config import STATEMENT_CACHE_DIR, STATEMENT_CACHE_TTL
+from services.judge_client import judge_client
+from utils.logger import log_error
+
+
+class StatementCache:
+    """
+    Content-addressed on-disk cache of problem statement PDFs
+
+    Each statement is stored once under blobs/<sha256>.pdf; a small JSON
+    file per problem records which blob it points to, its headers and when
+    its content last changed. The sha256 doubles as the ETag.
+
+    A cached statement is served as is for `ttl` seconds, then fetched again
+    on the next request; if the judge fails meanwhile the old copy keeps
+    being served. Concurrent misses for one problem share a single fetch
+    (through a fixed set of striped locks, so arbitrary problem ids don't
+    grow the cache's state). A blob no entry points to any more is deleted.
+    """
+
+    FETCH_LOCK_STRIPES = 64
+
+    def __init__(
+        self, judge=judge_client, directory=STATEMENT_CACHE_DIR, ttl=STATEMENT_CACHE_TTL
+    ):
+        self.judge = judge
+        self.ttl = ttl
+        self.blob_dir = os.path.join(directory, "blobs")
+        self.entry_dir = os.path.join(directory, "problems")
+        self._lock = threading.Lock()
+        self._entries = {}
+        self._fetch_locks = [threading.Lock() for _ in range(self.FETCH_LOCK_STRIPES)]
+        self._blob_lock = threading.Lock()
+
+    def _entry_path(self, problem_id):
+        name = hashlib.sha1(str(problem_id).encode()).hexdigest()
+        return os.path.join(self.entry_dir, f"{name}.json")
+
+    def _load_entry(self, problem_id):
+        """The cached entry of a problem, from memory or from disk"""
+        with self._lock:
+            entry = self._entries.get(str(problem_id))
+        if entry is None:
+            try:
+                with open(self._entry_path(problem_id)) as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            # Age is tracked per process; a fresh process revalidates first
+            entry["fetched_at"] = 0.0
+        if not os.path.exists(entry["path"]):
+            return None
+        return entry
+
+    def _fetch_lock(self, problem_id):
+        digest = hashlib.sha1(str(problem_id).encode()).digest()
+        return self._fetch_locks[digest[0] % len(self._fetch_locks)]
+
+    def _drop_blob(self, path):
+        """Delete a superseded blob unless another entry still points to it"""
+        with self._blob_lock:
+            for name in os.listdir(self.entry_dir):
+                if not name.endswith(".json"):
+                    continue
+                try:
+                    with open(os.path.join(self.entry_dir, name)) as f:
+                        if json.load(f).get("path") == path:
+                            return
+                except (OSError, ValueError):
+                    continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _fetch(self, problem_id, previous):
+        """Download a statement into the blob store and record its entry"""
+        os.makedirs(self.blob_dir, exist_ok=True)
+        os.makedirs(self.entry_dir, exist_ok=True)
+
+        response = self.judge.get(
+            f"/problem/{problem_id}/statement",
+            endpoint="/problem/<id>/statement",
+            stream=True,
+        )
+        try:
+            response.raise_for_status()
+            digest = hashlib.sha256()
+            tmp = tempfile.NamedTemporaryFile(
+                dir=self.blob_dir, suffix=".part", delete=False
+            )
+            try:
+                with tmp:
+                    for chunk in response.iter_content(chunk_size=65536):
+                        digest.update(chunk)
+                        tmp.write(chunk)
+            except Exception:
+                os.remove(tmp.name)
+                raise
+        finally:
+            response.close()
+
+        sha = digest.hexdigest()
+        path = os.path.join(self.blob_dir, f"{sha}.pdf")
+        if os.path.exists(path):
+            os.remove(tmp.name)
+        else:
+            os.replace(tmp.name, path)
+
+        unchanged = previous is not None and previous["etag"] == sha
+        entry = {
+            "path": path,
+            "etag": sha,
+            "last_modified": (
+                previous["last_modified"]
+                if unchanged
+                else datetime.now(timezone.utc).timestamp()
+            ),
+            "content_type": response.headers.get("content-type", "application/pdf"),
+            "content_disposition": response.headers.get(
+                "content-disposition",
+                f'inline; filename="problem_{problem_id}_statement.pdf"',
+            ),
+        }
+        with tempfile.NamedTemporaryFile(
+            "w", dir=self.entry_dir, suffix=".part", delete=False
+        ) as tmp:
+            json.dump(entry, tmp)
+        os.replace(tmp.name, self._entry_path(problem_id))
+
+        entry["fetched_at"] = time.monotonic()
+        with self._lock:
+            self._entries[str(problem_id)] = entry
+
+        if previous is not None and previous["path"] != path:
+            try:
+                self._drop_blob(previous["path"])
+            except OSError as e:
+                log_error(f"Failed to delete statement blob {previous['path']}: {e}")
+        return entry
+
+    def get(self, problem_id):
+        """
+        The cached statement of a problem, fetching it first if missing or
+        older than `ttl`
+
+        Returns a dict with path, etag, last_modified (a UTC timestamp),
+        content_type and content_disposition.
+        """
+        entry = self._load_entry(problem_id)
+        if entry is not None and time.monotonic() - entry["fetched_at"] < self.ttl:
+            return entry
+
+        with self._fetch_lock(problem_id):
+            # Someone else may have fetched it while we waited
+            current = self._load_entry(problem_id)
+            if (
+                current is not None
+                and time.monotonic() - current["fetched_at"] < self.ttl
+            ):
+                return current
+            try:
+                return self._fetch(problem_id, current)
+            except (requests.RequestException, OSError) as e:
+                if current is None:
+                    raise
+                log_error(f"Serving cached statement of {problem_id}: {e}")
+                # Don't ask the judge again on every request while it fails
+                current["fetched_at"] = time.monotonic()
+                with self._lock:
+                    self._entries[str(problem_id)] = current
+                return current
+
+    def stats(self):
+        """Number of statements cached by this process"""
+        with self._lock:
+            return {"statements": len(self._entries)}
+
+
+statement_cache = StatementCache()
@@ -1,125 +1,429 @@
-import os
-import uuid
-import requests
+import hashlib
 from werkzeug.utils import secure_filename
 from models.solution import Solution
 import psycopg2
 import psycopg2.extras
-from config import DB_HOST, DB_PORT, DB_NAME, DB_USER, DB_PASSWORD
-from services.connection import get_connection
-from datetime import datetime
-
-
-class SubmissionService:
+from config import (
+    DB_HOST,
+    DB_PORT,
+    DB_NAME,
+    DB_USER,
+    DB_PASSWORD,
+    MAX_SOURCE_SIZE,
+    SUBMISSION_REUSE_VERDICTS,
+    SUBMISSION_REUSE_MAX_AGE,
+)
+from services.connection import DatabaseService, release_connection
+from services.contest_index import active_contest_index
+from services.dispatcher import judge_dispatcher
+from services.notifier import verdict_notifier
+from services.problem_catalogue import problem_catalogue
+from services.rate_limiter import submission_rate_limiter
+from services.leaderboard import PENALTY_MINUTES
+from services.leaderboard_feed import leaderboard_feed
+from services.standings import REFRESH_FOR_SUBMISSIONS, StandingsService
+from utils.logger import log_error, log_info
+from utils.pagination import decode_cursor, encode_cursor
+from datetime import datetime, timezone
+import json
+
+# Statuses a submission has while it waits for a verdict
+IN_PROGRESS_STATUSES = ("pending", "queued", "processing")
+
+# Apply a batch of verdicts, passed as parallel arrays: the summary goes to
+# submissions, the full judge response to submission_details
+_UPDATE_VERDICTS = """
+    WITH v AS (
+        SELECT * FROM unnest(
+            %(ids)s::int[], %(problem_ids)s::varchar[], %(statuses)s::varchar[],
+            %(judge_responses)s::text[], %(execution_times)s::numeric[],
+            %(memory_used)s::int[], %(tests_passed)s::int[],
+            %(tests_failed)s::int[], %(verdicts)s::varchar[]
+        ) AS v(id, problem_id, status, judge_response, execution_time,
+               memory_used, tests_passed, tests_failed, verdict)
+    ),
+    updated AS (
+        UPDATE submissions s
+        SET status = v.status,
+            execution_time = v.execution_time,
+            memory_used = v.memory_used,
+            tests_passed = v.tests_passed,
+            tests_failed = v.tests_failed,
+            verdict = v.verdict
+        FROM v
+        WHERE s.id = v.id AND s.problem_id = v.problem_id
+        RETURNING s.id, s.problem_id, s.submission_time
+    ),
+    stored AS (
+        INSERT INTO submission_details (submission_id, judge_response)
+        SELECT v.id, v.judge_response::jsonb
+        FROM v JOIN updated u ON u.id = v.id
+        WHERE v.judge_response IS NOT NULL
+        ON CONFLICT (submission_id) DO UPDATE
+        SET judge_response = EXCLUDED.judge_response
+    ),
+    cleared AS (
+        DELETE FROM submission_details d
+        USING v JOIN updated u ON u.id = v.id
+        WHERE d.submission_id = v.id AND v.judge_response IS NULL
+    )
+    SELECT * FROM updated
+"""
+
+# Record the judged submissions in every contest the submitter is registered
+# for that contains the problem and was running at submission time. Submissions
+# still in progress are left out, and a later verdict (a rejudge) replaces the
+# outcome of an earlier one.
+_INSERT_CONTEST_VERDICTS = """
+    INSERT INTO contest_submissions
+    (contest_id, user_id, problem_id, submission_id, submission_time,
+     is_accepted, score, penalty_time, contest_start_time, contest_end_time)
+    SELECT c.id, s.user_id, s.problem_id, s.id, s.submission_time,
+           v.is_accepted, v.score, v.penalty_time, c.start_time, c.end_time
+    FROM unnest(
+        %(ids)s::int[], %(accepted)s::boolean[], %(scores)s::int[],
+        %(penalties)s::int[]
+    ) AS v(id, is_accepted, score, penalty_time)
+    JOIN submissions s ON s.id = v.id
+    JOIN contest_participants cp ON cp.user_id = s.user_id
+    JOIN contest_problems p
+        ON p.contest_id = cp.contest_id AND p.problem_id = s.problem_id
+    JOIN contests c ON c.id = cp.contest_id
+    WHERE s.id = ANY(%(submission_ids)s)
+    AND s.status <> ALL(%(in_progress_statuses)s)
+    AND s.submission_time >= c.start_time
+    AND s.submission_time < c.end_time
+    ON CONFLICT (contest_id, submission_id) DO UPDATE
+    SET is_accepted = EXCLUDED.is_accepted,
+        score = EXCLUDED.score,
+        penalty_time = EXCLUDED.penalty_time;
+"""
+
+# Same, for (submission, contest) candidates already resolved by the active
+# contest index: only the registration and status checks are left to the
+# database
+_INSERT_INDEXED_CONTEST_VERDICTS = """
+    INSERT INTO contest_submissions
+    (contest_id, user_id, problem_id, submission_id, submission_time,
+     is_accepted, score, penalty_time, contest_start_time, contest_end_time)
+    SELECT k.contest_id, s.user_id, s.problem_id, s.id, s.submission_time,
+           v.is_accepted, v.score, v.penalty_time, k.start_time, k.end_time
+    FROM unnest(
+        %(candidate_submissions)s::int[], %(candidate_contests)s::int[],
+        %(candidate_starts)s::timestamptz[], %(candidate_ends)s::timestamptz[]
+    ) AS k(submission_id, contest_id, start_time, end_time)
+    JOIN unnest(
+        %(ids)s::int[], %(accepted)s::boolean[], %(scores)s::int[],
+        %(penalties)s::int[]
+    ) AS v(id, is_accepted, score, penalty_time) ON v.id = k.submission_id
+    JOIN submissions s ON s.id = k.submission_id
+    JOIN contest_participants cp
+        ON cp.contest_id = k.contest_id AND cp.user_id = s.user_id
+    WHERE s.status <> ALL(%(in_progress_statuses)s)
+    ON CONFLICT (contest_id, submission_id) DO UPDATE
+    SET is_accepted = EXCLUDED.is_accepted,
+        score = EXCLUDED.score,
+        penalty_time = EXCLUDED.penalty_time;
+"""
+
+# Bump the versions of the contests whose leaderboard shows the submissions
+# (pending flags included)
+_BUMP_CONTEST_VERSIONS = """
+    UPDATE contests SET version = version + 1
+    WHERE id IN (
+        SELECT id FROM contests
+        WHERE id IN (
+            SELECT cp.contest_id
+            FROM submissions s
+            JOIN contest_participants cp ON cp.user_id = s.user_id
+            JOIN contest_problems p
+                ON p.contest_id = cp.contest_id AND p.problem_id = s.problem_id
+            WHERE s.id = ANY(%(submission_ids)s)
+        )
+        ORDER BY id
+        FOR UPDATE
+    );
+"""
+
+# After an insert: refresh the touched standings, bump the contest versions
+# and return the contests the submissions are recorded in
+_RECORD_CONTEST_VERDICTS = (
+    REFRESH_FOR_SUBMISSIONS
+    + _BUMP_CONTEST_VERSIONS
+    + """
+    SELECT DISTINCT contest_id
+    FROM contest_submissions
+    WHERE submission_id = ANY(%(submission_ids)s);
+"""
+)
+
+
+def summarize_judge_response(judge_response):
+    """
+    (tests_passed, tests_failed, verdict) stored with a submission: the test
+    counts of the response summary, and "Accepted" if every test passed or
+    else the verdict of the first failed test
+    """
+    if not judge_response:
+        return None, None, None
+    summary = judge_response.get("summary") or {}
+    passed = summary.get("passed")
+    failed = summary.get("failed")
+
+    verdict = None
+    results = judge_response.get("results")
+    if isinstance(results, list) and results:
+        failing = [
+            r.get("verdict") if isinstance(r, dict) else None
+            for r in results
+            if not isinstance(r, dict) or r.get("verdict") != "Accepted"
+        ]
+        verdict = failing[0] if failing else "Accepted"
+
+    return (
+        int(passed) if passed is not None else None,
+        int(failed) if failed is not None else None,
+        verdict,
+    )
+
+
+def contest_outcome(status, judge_response):
+    """(is_accepted, score, penalty_time) a verdict counts for in contests"""
+    if status in ["completed", "accepted"] and judge_response:
+        # Accepted when all test cases passed
+        if judge_response.get("summary", {}).get("failed", 0) == 0:
+            return True, 100, 0
+        return False, 0, PENALTY_MINUTES
+    return False, 0, 0
+
+
+class SubmissionService(DatabaseService):
     """
     Submission service for handling solution submissions
     """
 
     def __init__(self):
-        self.conn = get_connection()
-        self.cursor = self.conn.cursor(cursor_factory=psycopg2.extras.RealDictCursor)
-        judge_host = os.getenv("JUDGE_HOST", "mini-judge")
-        judge_port = os.getenv("JUDGE_PORT", "3000")
-        self.judge_base_url = f"http://{judge_host}:{judge_port}"
-        self.upload_folder = "tmp"
-        os.makedirs(self.upload_folder, exist_ok=True)
-
-    def save_submission(self, problem_id, language, user_id):
+        self.standings = StandingsService()
+        self.rate_limiter = submission_rate_limiter
+
+    def save_submission(
+        self, problem_id, language, user_id, source_hash=None, problem_version=None
+    ):
         """
-        Save a submission to the database
+        Save a submission to the database (the caller commits)
         """
         query = """
-            INSERT INTO submissions (problem_id, language, user_id)
-            VALUES (%s, %s, %s)
+            INSERT INTO submissions
+            (problem_id, language, user_id, source_hash, problem_version)
+            VALUES (%s, %s, %s, %s, %s)
             RETURNING id
         """
-        self.cursor.execute(query, (problem_id, language, user_id))
-        self.conn.commit()
+        self.cursor.execute(
+            query, (problem_id, language, user_id, source_hash, problem_version)
+        )
         return self.cursor.fetchone()["id"]
 
-    def update_judge_submission_id(self, db_id, judge_submission_id):
+    def find_judged_duplicate(self, problem_id, language, source_hash, version):
         """
-        Update the submission with the judge submission ID
+        The most recent judged submission with the same source, language and
+        problem version, judged less than SUBMISSION_REUSE_MAX_AGE seconds
+        ago, with its judge response; None if there is none
+
+        Time limit verdicts are never reused, as they may not be repeatable.
         """
         query = """
-            UPDATE submissions 
-            SET judge_submission_id = %s
-            WHERE id = %s
+            SELECT s.status, s.execution_time, s.memory_used, d.judge_response
+            FROM submissions s
+            JOIN submission_details d ON d.submission_id = s.id
+            WHERE s.source_hash = %s AND s.problem_id = %s AND s.language = %s
+            AND s.problem_version = %s
+            AND s.status IN ('completed', 'accepted')
+            AND s.verdict IS NOT NULL AND s.verdict NOT ILIKE '%%time limit%%'
+            AND s.submission_time > CURRENT_TIMESTAMP - %s * INTERVAL '1 second'
+            ORDER BY s.submission_time DESC, s.id DESC
+            LIMIT 1
+        """
+        self.cursor.execute(
+            query,
+            (source_hash, str(problem_id), language, version, SUBMISSION_REUSE_MAX_AGE),
+        )
+        return self.cursor.fetchone()
+
+    def registered_contest(self, user_id, problem_id, at):
+        """
+        The running contest (at time `at`) containing the problem that the
+        user is registered for, with its submission rate limits and verdict
+        reuse flag, or None
         """
-        self.cursor.execute(query, (judge_submission_id, db_id))
-        self.conn.commit()
+        intervals = active_contest_index.lookup(problem_id, at)
+        if intervals == []:
+            return None  # No contest running with this problem
+
+        if intervals is not None:
+            # The index knows the contests; only registration is left to check
+            query = """
+                SELECT c.id, c.submission_burst, c.submission_rate_per_minute,
+                       c.reuse_verdicts
+                FROM contest_participants cp
+                JOIN contests c ON c.id = cp.contest_id
+                WHERE cp.user_id = %(user_id)s AND cp.contest_id = ANY(%(contests)s)
+                ORDER BY c.start_time DESC, c.id DESC
+                LIMIT 1
+            """
+        else:
+            query = """
+                SELECT c.id, c.submission_burst, c.submission_rate_per_minute,
+                       c.reuse_verdicts
+                FROM contest_participants cp
+                JOIN contest_problems p ON p.contest_id = cp.contest_id
+                JOIN contests c ON c.id = cp.contest_id
+                WHERE cp.user_id = %(user_id)s
+                AND p.problem_id = %(problem_id)s
+                AND c.start_time <= %(time)s AND c.end_time > %(time)s
+                ORDER BY c.start_time DESC, c.id DESC
+                LIMIT 1
+            """
+        self.cursor.execute(
+            query,
+            {
+                "user_id": user_id,
+                "problem_id": str(problem_id),
+                "time": at,
+                "contests": [contest_id for _, _, contest_id in intervals or ()],
+            },
+        )
+        return self.cursor.fetchone()
+
+    def queue_submission(
+        self, db_id, problem_id, language, file_name, source, lane="practice"
+    ):
+        """
+        Add a submission to a lane of the judge dispatch queue (the caller
+        commits)
+        """
+        query = """
+            INSERT INTO judge_dispatch_queue
+            (submission_id, problem_id, language, file_name, source, lane)
+            VALUES (%s, %s, %s, %s, %s, %s)
+        """
+        self.cursor.execute(
+            query,
+            (db_id, problem_id, language, file_name, psycopg2.Binary(source), lane),
+        )
+
+    def read_source(self, file):
+        """
+        Read an uploaded source file from its stream, enforcing MAX_SOURCE_SIZE
+
+        The declared part size is checked before anything is read, and at most
+        one byte past the limit is ever pulled from the stream.
+        """
+        if file.content_length and file.content_length > MAX_SOURCE_SIZE:
+            raise Exception(f"Source file exceeds {MAX_SOURCE_SIZE} bytes")
+
+        source = file.stream.read(MAX_SOURCE_SIZE + 1)
+        if len(source) > MAX_SOURCE_SIZE:
+            raise Exception(f"Source file exceeds {MAX_SOURCE_SIZE} bytes")
+        if not source:
+            raise Exception("Source file is empty")
+        return source
 
     def submit_solution(self, file, problem_id, language, user_id):
         """
         Submit a solution to a problem
+
+        The submission and its source are stored in one transaction and handed
+        to the background judge dispatcher; the judge is not contacted here.
+        Raises RateLimited when the user submits too fast.
+
+        If the source is byte-identical to an earlier judged submission of
+        the same problem version (and reuse is enabled for practice or the
+        contest), that verdict is recorded for this submission instead, through
+        the usual verdict path so contest attempts and penalties still count.
         """
         # Validate required fields
         if not file or not problem_id or not language:
             raise Exception("Missing required fields: file, problem_id, language")
 
-        # Sanitize and save the file
         original_filename = secure_filename(file.filename)
-        unique_id = str(uuid.uuid4())
-        saved_filename = f"{unique_id}_{original_filename}"
-        file_path = os.path.join(self.upload_folder, saved_filename)
+        source = self.read_source(file)
+        source_hash = hashlib.sha256(source).hexdigest()
+        # Never wait for the judge here: without a cached catalogue the
+        # submission just isn't matched against earlier ones
+        version = problem_catalogue.version(problem_id, wait=False)
 
         try:
-            file.save(file_path)
-
-            # Save submission to database first to get the ID
-            db_id = self.save_submission(problem_id, language, user_id)
-
-            # Forward to judge server with callback URL
-            judge_url = f"{self.judge_base_url}/judge"
-            print(f"Submitting to judge at: {judge_url}")
-
-            # Create callback URL for the judge to send results back
-            callback_url = f"http://backend:5000/submission/result"
-            print(f"Callback URL: {callback_url}")
-
-            with open(file_path, "rb") as f:
-                files = {"code": (saved_filename, f)}
-                payload = {
-                    "problemID": problem_id,
-                    "language": language,
-                    "submission_id": str(db_id),
-                    "callback_url": callback_url,
-                }
-                print(f"Payload: {payload}")
-
-                judge_response = requests.post(judge_url, files=files, data=payload)
-                print(f"Judge response status: {judge_response.status_code}")
-                print(f"Judge response: {judge_response.text}")
-                judge_response.raise_for_status()
-
-                # Parse the judge response to get the judge submission ID
-                judge_data = judge_response.json()
-                judge_submission_id = judge_data.get("submissionId")
-
-                # Update our database with the judge submission ID
-                if judge_submission_id:
-                    self.update_judge_submission_id(db_id, judge_submission_id)
+            # Submissions to a contest the user takes part in are rate limited
+            # per contest and dispatched in the contest lane
+            contest = self.registered_contest(
+                user_id, problem_id, datetime.now(timezone.utc)
+            )
+            self.rate_limiter.admit(self.cursor, user_id, contest)
+            db_id = self.save_submission(
+                problem_id, language, user_id, source_hash, version
+            )
+            reuse = (
+                SUBMISSION_REUSE_VERDICTS
+                if contest is None
+                else contest["reuse_verdicts"]
+            )
+            duplicate = None
+            if reuse and version is not None:
+                duplicate = self.find_judged_duplicate(
+                    problem_id, language, source_hash, version
+                )
+            if duplicate is None:
+                lane = "practice" if contest is None else "contest"
+                self.queue_submission(
+                    db_id, problem_id, language, original_filename, source, lane
+                )
+            self.standings.bump_pending_versions(user_id, problem_id)
+            if duplicate is None:
+                self.conn.commit()
+            else:
+                # Commits the submission together with the reused verdict
+                self.record_judge_results(
+                    [
+                        {
+                            "submission_id": db_id,
+                            "problem_id": problem_id,
+                            "status": duplicate["status"],
+                            "judge_response": duplicate["judge_response"],
+                            "execution_time": duplicate["execution_time"],
+                            "memory_used": duplicate["memory_used"],
+                        }
+                    ]
+                )
+        except Exception as e:
+            self.conn.rollback()
+            raise e
 
+        if duplicate is not None:
+            log_info(f"Reused the verdict of an identical submission for {db_id}")
             return {
                 "data": {
                     "submission_id": db_id,
-                    "judge_submission_id": judge_submission_id,
-                    "message": "Solution submitted successfully",
-                    "judge_response": judge_response.json(),
+                    "judge_submission_id": None,
+                    "status": duplicate["status"],
+                    "message": "Identical to an earlier submission, verdict reused",
                 },
-                "status_code": judge_response.status_code,
+                "status_code": 202,
                 "db_id": db_id,
             }
 
-        except Exception as e:
-            # Clean up file if it exists
-            if os.path.exists(file_path):
-                os.remove(file_path)
-            raise e
-        finally:
-            # Clean up file after processing
-            if os.path.exists(file_path):
-                os.remove(file_path)
+        judge_dispatcher.notify()
+        log_info(f"Queued submission {db_id} for judging ({lane} lane)")
+
+        return {
+            "data": {
+                "submission_id": db_id,
+                "judge_submission_id": None,
+                "status": "pending",
+                "message": "Solution queued for judging",
+            },
+            "status_code": 202,
+            "db_id": db_id,
+        }
 
     def get_submission_status(self, submission_id):
         """
@@ -128,7 +432,8 @@ class SubmissionService:
         # Get submission data from database
         query = """
             SELECT id, user_id, problem_id, language, submission_time, 
-                   status, judge_response, execution_time, memory_used, judge_submission_id
+                   status, execution_time, memory_used, judge_submission_id,
+                   judge_node, tests_passed, tests_failed, verdict
             FROM submissions WHERE id = %s
         """
         self.cursor.execute(query, (submission_id,))
@@ -145,7 +450,9 @@ class SubmissionService:
                 "problem_id": submission_data.get("problem_id"),
                 "language": submission_data.get("language"),
                 "status": submission_data.get("status", "queued"),
-                "judge_response": submission_data.get("judge_response"),
+                "tests_passed": submission_data.get("tests_passed"),
+                "tests_failed": submission_data.get("tests_failed"),
+                "verdict": submission_data.get("verdict"),
                 "execution_time": (
                     float(submission_data.get("execution_time"))
                     if submission_data.get("execution_time")
@@ -153,6 +460,7 @@ class SubmissionService:
                 ),
                 "memory_used": submission_data.get("memory_used"),
                 "judge_submission_id": submission_data.get("judge_submission_id"),
+                "judge_node": submission_data.get("judge_node"),
                 "submission_time": (
                     submission_data.get("submission_time").isoformat()
                     if submission_data.get("submission_time")
@@ -162,53 +470,120 @@ class SubmissionService:
             "status_code": 200,
         }
 
-    def get_user_submissions(self, user_id):
+    def wait_for_verdict(self, submission_id, timeout):
         """
-        Get all submissions for a specific user
+        Long-poll a submission's status until it leaves the in-progress
+        states or `timeout` seconds pass
         """
-        query = """
-            SELECT s.id, s.problem_id, s.language, s.submission_time, s.status, s.judge_response, s.execution_time, s.memory_used, s.judge_submission_id
+        event = verdict_notifier.subscribe(submission_id)
+        try:
+            result = self.get_submission_status(submission_id)
+            if result["data"]["status"] not in IN_PROGRESS_STATUSES:
+                return result
+
+            # Don't hold a pooled connection while the request sleeps
+            release_connection()
+            if event.wait(timeout):
+                result = self.get_submission_status(submission_id)
+            return result
+        finally:
+            verdict_notifier.unsubscribe(submission_id, event)
+
+    def get_user_submissions(
+        self,
+        user_id,
+        problem_id=None,
+        status=None,
+        language=None,
+        limit=None,
+        cursor=None,
+        include_judge_response=False,
+    ):
+        """
+        Get a user's submissions, newest first
+
+        Args:
+            problem_id, status, language: only submissions matching these
+            limit: page size; without it every matching submission is returned
+            cursor: `next_cursor` of the previous page
+            include_judge_response: also return the full judge_response from
+                submission_details
+
+        Returns (submissions, next_cursor); next_cursor is None on the last
+        page.
+        """
+        conditions = ["s.user_id = %(user_id)s"]
+        params = {"user_id": user_id}
+        for column, value in (
+            ("problem_id", problem_id),
+            ("status", status),
+            ("language", language),
+        ):
+            if value is not None:
+                conditions.append(f"s.{column} = %({column})s")
+                params[column] = value
+        if cursor is not None:
+            params["cursor_time"], params["cursor_id"] = decode_cursor(cursor)
+            conditions.append(
+                "(s.submission_time, s.id) < (%(cursor_time)s, %(cursor_id)s)"
+            )
+        if limit is not None:
+            # One extra row tells whether there is a next page
+            params["limit"] = limit + 1
+
+        query = f"""
+            SELECT s.id, s.problem_id, s.language, s.submission_time, s.status,
+                   {"d.judge_response," if include_judge_response else ""}
+                   s.execution_time, s.memory_used, s.judge_submission_id,
+                   s.tests_passed, s.tests_failed, s.verdict
             FROM submissions s
-            WHERE s.user_id = %s
-            ORDER BY s.submission_time DESC
+            {"LEFT JOIN submission_details d ON d.submission_id = s.id"
+             if include_judge_response else ""}
+            WHERE {" AND ".join(conditions)}
+            ORDER BY s.submission_time DESC, s.id DESC
+            {"LIMIT %(limit)s" if limit is not None else ""}
         """
 
         try:
-            print(f"Attempting to get submissions for user {user_id}")
-            self.cursor.execute(query, (user_id,))
+            self.cursor.execute(query, params)
             submissions = self.cursor.fetchall()
-            print(f"Found {len(submissions)} submissions")
-
-            # Convert to list of dictionaries
-            result = []
-            for submission in submissions:
-                result.append(
-                    {
-                        "id": submission["id"],
-                        "problem_id": submission["problem_id"],
-                        "language": submission["language"],
-                        "submission_time": (
-                            submission["submission_time"].isoformat() + "Z"
-                            if submission["submission_time"]
-                            else None
-                        ),
-                        "status": submission["status"],
-                        "judge_response": submission["judge_response"],
-                        "execution_time": submission["execution_time"],
-                        "memory_used": submission["memory_used"],
-                        "judge_submission_id": submission["judge_submission_id"],
-                    }
-                )
-
-            return {"data": result, "status_code": 200}
         except Exception as e:
             print(f"Database error in get_user_submissions: {e}")
-            print(f"Error type: {type(e)}")
-            import traceback
-
-            traceback.print_exc()
             raise Exception(f"Failed to get user submissions: {e}")
 
+        next_cursor = None
+        if limit is not None and len(submissions) > limit:
+            submissions = submissions[:limit]
+            next_cursor = encode_cursor(
+                submissions[-1]["submission_time"], submissions[-1]["id"]
+            )
+
+        for submission in submissions:
+            if submission["submission_time"]:
+                submission["submission_time"] = (
+                    submission["submission_time"].isoformat() + "Z"
+                )
+        return submissions, next_cursor
+
+    def get_submission_detail(self, submission_id, user_id):
+        """
+        Get the full judge response of one of a user's submissions, or None
+        if the user has no such submission
+        """
+        self.cursor.execute(
+            """
+            SELECT s.id, d.judge_response
+            FROM submissions s
+            LEFT JOIN submission_details d ON d.submission_id = s.id
+            WHERE s.id = %s AND s.user_id = %s
+        """,
+            (submission_id, user_id),
+        )
+        row = self.cursor.fetchone()
+        if row is None:
+            return None
+        return {"submission_id": row["id"], "judge_response": row["judge_response"]}
+
     def update_submission_result(
         self,
         submission_id,
@@ -221,56 +596,158 @@ class SubmissionService:
         """
         Update submission result when received from judge
         """
-        print(f"Updating submission result: {submission_id}, {problem_id}, {status}")
-        print(f"Judge response: {judge_response}")
-        print(f"Execution time: {execution_time}, Memory: {memory_used}")
-
-        query = """
-            UPDATE submissions 
-            SET status = %s, 
-                judge_response = %s,
-                execution_time = %s,
-                memory_used = %s
-            WHERE id = %s AND problem_id = %s
-            RETURNING id
-        """
-
-        try:
-            print(
-                f"Executing query with params: {status}, {judge_response}, {execution_time}, {memory_used}, {submission_id}, {problem_id}"
+        log_info(f"Updating submission result: {submission_id}, {problem_id}, {status}")
+        updated = self.record_judge_results(
+            [
+                {
+                    "submission_id": submission_id,
+                    "problem_id": problem_id,
+                    "status": status,
+                    "judge_response": judge_response,
+                    "execution_time": execution_time,
+                    "memory_used": memory_used,
+                }
+            ]
+        )
+        if not updated:
+            log_error(f"No rows updated for submission {submission_id}")
+            raise Exception(
+                "Failed to update submission result: "
+                "Submission not found or problem_id mismatch"
             )
 
-            # Convert judge_response dict to JSON string for PostgreSQL
-            import json
+        log_info(f"Successfully updated submission {submission_id}")
+        return {
+            "data": {"message": "Submission result updated successfully"},
+            "status_code": 200,
+        }
 
-            judge_response_json = json.dumps(judge_response) if judge_response else None
+    def record_judge_results(self, verdicts):
+        """
+        Record a batch of judge verdicts in one transaction
+
+        Each verdict is a dict with submission_id, problem_id, status and
+        optionally judge_response, execution_time and memory_used. The
+        judge response is stored in submission_details and summarized in
+        submissions. Everything is written set-based, in two round trips
+        whatever the number of verdicts or contests: the submission update,
+        then one batch inserting the contest_submissions rows, refreshing the
+        affected standings and bumping the contest versions. Submissions in
+        no running contest only get the version bump. The contests a
+        submission counts for come from the active contest index when it
+        covers the submission time, leaving only the registration check to
+        the database. Verdicts whose submission_id/problem_id pair does not
+        exist are skipped.
+
+        Returns the ids of the updated submissions.
+        """
+        # A later verdict for the same submission wins
+        by_id = {int(v["submission_id"]): v for v in verdicts}
+        if not by_id:
+            return []
 
-            self.cursor.execute(
-                query,
+        outcomes = [
+            contest_outcome(v["status"], v.get("judge_response"))
+            for v in by_id.values()
+        ]
+        summaries = [
+            summarize_judge_response(v.get("judge_response")) for v in by_id.values()
+        ]
+        params = {
+            "ids": list(by_id),
+            "problem_ids": [str(v["problem_id"]) for v in by_id.values()],
+            "statuses": [v["status"] for v in by_id.values()],
+            "judge_responses": [
+                json.dumps(v["judge_response"]) if v.get("judge_response") else None
+                for v in by_id.values()
+            ],
+            "execution_times": [
                 (
-                    status,
-                    judge_response_json,  # Use JSON string instead of dict
-                    execution_time,
-                    memory_used,
-                    submission_id,
-                    problem_id,
-                ),
-            )
-            self.conn.commit()
+                    float(v["execution_time"])
+                    if v.get("execution_time") is not None
+                    else None
+                )
+                for v in by_id.values()
+            ],
+            "memory_used": [
+                int(v["memory_used"]) if v.get("memory_used") is not None else None
+                for v in by_id.values()
+            ],
+            "tests_passed": [summary[0] for summary in summaries],
+            "tests_failed": [summary[1] for summary in summaries],
+            "verdicts": [summary[2] for summary in summaries],
+            "accepted": [outcome[0] for outcome in outcomes],
+            "scores": [outcome[1] for outcome in outcomes],
+            "penalties": [outcome[2] for outcome in outcomes],
+            "penalty_minutes": PENALTY_MINUTES,
+            "in_progress_statuses": list(IN_PROGRESS_STATUSES),
+        }
 
-            if self.cursor.rowcount == 0:
-                print(f"No rows updated for submission {submission_id}")
-                raise Exception("Submission not found or problem_id mismatch")
+        try:
+            self.cursor.execute(_UPDATE_VERDICTS, params)
+            updated = self.cursor.fetchall()
+            params["submission_ids"] = [row["id"] for row in updated]
 
-            print(f"Successfully updated submission {submission_id}")
-            return {
-                "data": {"message": "Submission result updated successfully"},
-                "status_code": 200,
-            }
+            contest_ids = []
+            candidates = self._contest_candidates(updated)
+            if candidates is None:
+                self.cursor.execute(
+                    _INSERT_CONTEST_VERDICTS + _RECORD_CONTEST_VERDICTS, params
+                )
+                contest_ids = [row["contest_id"] for row in self.cursor.fetchall()]
+            elif candidates:
+                params["candidate_submissions"] = [c[0] for c in candidates]
+                params["candidate_contests"] = [c[1] for c in candidates]
+                params["candidate_starts"] = [c[2] for c in candidates]
+                params["candidate_ends"] = [c[3] for c in candidates]
+                self.cursor.execute(
+                    _INSERT_INDEXED_CONTEST_VERDICTS + _RECORD_CONTEST_VERDICTS,
+                    params,
+                )
+                contest_ids = [row["contest_id"] for row in self.cursor.fetchall()]
+            elif updated:
+                # In no running contest, but pending flags may still be shown
+                self.cursor.execute(_BUMP_CONTEST_VERSIONS, params)
+
+            # Delivered on commit
+            for submission_id in params["submission_ids"]:
+                verdict_notifier.notify(self.cursor, submission_id)
+            for contest_id in contest_ids:
+                leaderboard_feed.notify(self.cursor, contest_id)
+            self.conn.commit()
         except Exception as e:
-            print(f"Error updating submission result: {e}")
             self.conn.rollback()
-            raise Exception(f"Failed to update submission result: {e}")
+            log_error(f"Error recording judge results: {e}")
+            raise Exception(f"Failed to record judge results: {e}")
+
+        for submission_id in params["submission_ids"]:
+            verdict_notifier.committed(submission_id)
+        for contest_id in contest_ids:
+            log_info(f"Recorded verdicts in contest {contest_id}")
+            leaderboard_feed.committed(contest_id)
+
+        return params["submission_ids"]
+
+    def _contest_candidates(self, submissions):
+        """
+        (submission_id, contest_id, start, end) for every contest containing
+        the problem that was running when each submission was made, from the
+        active contest index
+
+        Returns None if the index can't answer for one of the submissions.
+        """
+        candidates = []
+        for row in submissions:
+            intervals = active_contest_index.lookup(
+                row["problem_id"], row["submission_time"]
+            )
+            if intervals is None:
+                return None
+            candidates.extend(
+                (row["id"], contest_id, start, end)
+                for start, end, contest_id in intervals
+            )
+        return candidates
 
     def get_database_timezone_info(self):
         """Get database timezone information for debugging"""
@@ -295,166 +772,3 @@ class SubmissionService:
         except Exception as e:
             print(f"Error getting timezone info: {e}")
             return None
-
-    def get_active_contest_for_problem(self, problem_id):
-        """Get the active contest that contains this problem"""
-        try:
-            # Handle JSONB array properly
-            query = """
-                SELECT id, name, start_time, end_time, problems
-                FROM contests 
-                WHERE problems @> %s::jsonb
-                AND start_time <= CURRENT_TIMESTAMP 
-                AND end_time >= CURRENT_TIMESTAMP
-                ORDER BY start_time DESC
-                LIMIT 1
-            """
-
-            self.cursor.execute(query, (f'["{problem_id}"]',))
-            contest = self.cursor.fetchone()
-
-            if contest:
-                print(
-                    f"🎯 Found active contest for problem {problem_id}: {contest['name']} (ID: {contest['id']})"
-                )
-                print(
-                    f"   Contest time range: {contest['start_time']} to {contest['end_time']}"
-                )
-
-                # Contest is already found by the query which checks time constraints
-                print(f"   Contest is active (verified by query constraints)")
-            else:
-                print(f"ℹ️ No active contest found for problem {problem_id}")
-
-            return contest
-        except Exception as e:
-            print(f"❌ Error getting active contest for problem {problem_id}: {e}")
-            import traceback
-
-            traceback.print_exc()
-            return None
-
-    def get_all_active_contests_for_user_and_problem(
-        self, user_id, problem_id, submission_time=None
-    ):
-        """Get all active contests where the user is registered and the problem exists"""
-        try:
-            if submission_time:
-                # Use submission time for validation - submission must be within contest bounds
-                query = """
-                    SELECT DISTINCT c.id, c.name, c.start_time, c.end_time, c.problems
-                    FROM contests c
-                    JOIN contest_participants cp ON c.id = cp.contest_id
-                    WHERE cp.user_id = %s
-                    AND c.problems @> %s::jsonb
-                    AND %s >= c.start_time
-                    AND %s <= c.end_time
-                    ORDER BY c.start_time DESC
-                """
-                print(f"   Querying contests for submission at {submission_time}")
-                self.cursor.execute(
-                    query,
-                    (user_id, f'["{problem_id}"]', submission_time, submission_time),
-                )
-            else:
-                # Use current timestamp
-                query = """
-                    SELECT DISTINCT c.id, c.name, c.start_time, c.end_time, c.problems
-                    FROM contests c
-                    JOIN contest_participants cp ON c.id = cp.contest_id
-                    WHERE cp.user_id = %s
-                    AND c.problems @> %s::jsonb
-                    AND c.start_time <= CURRENT_TIMESTAMP
-                    AND c.end_time >= CURRENT_TIMESTAMP
-                    ORDER BY c.start_time DESC
-                """
-                self.cursor.execute(query, (user_id, f'["{problem_id}"]'))
-            contests = self.cursor.fetchall()
-
-            print(
-                f"🎯 Found {len(contests)} active contests for user {user_id} and problem {problem_id}"
-            )
-            for contest in contests:
-                print(f"   - {contest['name']} (ID: {contest['id']})")
-
-            return contests
-        except Exception as e:
-            print(
-                f"❌ Error getting active contests for user {user_id} and problem {problem_id}: {e}"
-            )
-            return []
-
-    def create_contest_submission(
-        self,
-        contest_id,
-        user_id,
-        problem_id,
-        submission_id,
-        submission_time,
-        is_accepted,
-        score=0,
-        penalty_time=0,
-    ):
-        """Create a contest submission entry"""
-        try:
-            # Get contest start and end times
-            query = """
-                SELECT start_time, end_time FROM contests WHERE id = %s
-            """
-            self.cursor.execute(query, (contest_id,))
-            contest = self.cursor.fetchone()
-
-            if not contest:
-                print(f"Contest {contest_id} not found")
-                return None
-
-            # Insert contest submission
-            insert_query = """
-                INSERT INTO contest_submissions 
-                (contest_id, user_id, problem_id, submission_id, submission_time, 
-                 is_accepted, score, penalty_time, contest_start_time, contest_end_time)
-                VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s)
-                RETURNING id
-            """
-
-            self.cursor.execute(
-                insert_query,
-                (
-                    contest_id,
-                    user_id,
-                    problem_id,
-                    submission_id,
-                    submission_time,
-                    is_accepted,
-                    score,
-                    penalty_time,
-                    contest["start_time"],
-                    contest["end_time"],
-                ),
-            )
-
-            result = self.cursor.fetchone()
-            self.conn.commit()
-            print(f"Created contest submission: {result['id']}")
-            return result["id"]
-
-        except Exception as e:
-            self.conn.rollback()
-            print(f"Error creating contest submission: {e}")
-            return None
-
-    def get_submission_details(self, submission_id):
-        """Get submission details including user_id"""
-        try:
-            query = """
-                SELECT id, user_id, problem_id, language, submission_time, status
-                FROM submissions 
-                WHERE id = %s
-            """
-
-            self.cursor.execute(query, (submission_id,))
-            submission = self.cursor.fetchone()
-            return submission
-        except Exception as e:
-            print(f"Error getting submission details: {e}")
-            return None
@@ -10,6 +10,7 @@ import sys
 import time
 from pathlib import Path
 from services.auth import AuthService
+from services.standings import StandingsService
 from config import DB_HOST, DB_NAME, DB_USER, DB_PASSWORD
 
 
@@ -180,6 +181,29 @@ def setup_tables():
         sys.exit(1)
 
 
+def backfill_standings():
+    """Build standings for contests that have submissions but no standings yet"""
+    try:
+        standings_service = StandingsService()
+        standings_service.cursor.execute(
+            """
+            SELECT DISTINCT cs.contest_id
+            FROM contest_submissions cs
+            WHERE NOT EXISTS (
+                SELECT 1 FROM contest_standings st
+                WHERE st.contest_id = cs.contest_id
+            )
+            """
+        )
+        contest_ids = [row["contest_id"] for row in standings_service.cursor.fetchall()]
+
+        for contest_id in contest_ids:
+            standings_service.rebuild(contest_id)
+            print(f"✅ Built standings for contest {contest_id}")
+    except Exception as e:
+        print(f"⚠️  Warning: Could not backfill contest standings: {e}")
+
+
 def main():
     """Main setup function"""
     print("🚀 Setting up Mini-Competition Database...")
@@ -196,6 +220,7 @@ def main():
 
     create_database()
     setup_tables()
+    backfill_standings()
 
     print("=" * 50)
     print("🎉 Database setup completed successfully!")
@@ -0,0 +1,51 @@
+"""
+Tests that /healthcheck reports the judge client's circuit breaker
+"""
+
+import os
+import sys
+from contextlib import contextmanager
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+# Don't start the dispatcher, health-check and notifier threads on import
+os.environ["START_BACKGROUND_WORKERS"] = "0"
+
+import main
+from services.judge_client import JudgeClient
+
+
+class _Cursor:
+    def execute(self, query):
+        pass
+
+    def close(self):
+        pass
+
+
+class _Connection:
+    def cursor(self):
+        return _Cursor()
+
+
+@contextmanager
+def _connection():
+    yield _Connection()
+
+
+def test_healthcheck_reports_judge_breaker(monkeypatch):
+    # Keep the check off the database; only the judge client is real
+    monkeypatch.setattr(main, "get_connection", _connection)
+    monkeypatch.setattr(main, "get_pool_stats", lambda: {})
+    monkeypatch.setattr(main.judge_dispatcher, "stats", lambda: {})
+    monkeypatch.setattr(main.submission_rate_limiter, "stats", lambda: {})
+    client = JudgeClient(endpoints=["http://judge.invalid"], eject_after=1)
+    client._release(client._acquire(), error="connection refused")
+    monkeypatch.setattr(main, "judge_client", client)
+
+    response = main.app.test_client().get("/healthcheck")
+
+    assert response.status_code == 200
+    judge = response.get_json()["judge_client"]
+    assert judge["breaker"] == {"state": "open", "rejected": 0}
+    assert judge["nodes"][0]["state"] == "open"
+    assert judge["nodes"][0]["last_error"] == "connection refused"
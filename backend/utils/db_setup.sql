@@ -23,11 +23,26 @@ CREATE TABLE IF NOT EXISTS submissions (
     language VARCHAR(50) NOT NULL,
     submission_time TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     status VARCHAR(50) DEFAULT 'pending',
-    judge_response JSONB,
+    judge_response JSONB, -- no longer written, see submission_details
     execution_time DECIMAL(10,3),
     memory_used INTEGER,
     user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
-    judge_submission_id VARCHAR(255)
+    judge_submission_id VARCHAR(255),
+    judge_node VARCHAR(255),
+    tests_passed INTEGER,
+    tests_failed INTEGER,
+    verdict VARCHAR(100),
+    source_hash VARCHAR(64), -- sha256 of the source
+    problem_version VARCHAR(64) -- see ProblemCatalogue.version
+);
+
+-- Create submission_details table: the full judge response of a submission,
+-- read only by the submission detail endpoint. Large responses are TOASTed
+-- and compressed out of line (ALTER COLUMN judge_response SET COMPRESSION
+-- lz4 on servers built with lz4 compresses them faster than the default).
+CREATE TABLE IF NOT EXISTS submission_details (
+    submission_id INTEGER PRIMARY KEY REFERENCES submissions(id) ON DELETE CASCADE,
+    judge_response JSONB NOT NULL
 );
 
 -- Create contests table
@@ -39,7 +54,20 @@ CREATE TABLE IF NOT EXISTS contests (
     end_time TIMESTAMPTZ NOT NULL,
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
     updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
-    problems JSONB
+    problems JSONB,
+    version BIGINT NOT NULL DEFAULT 1,
+    submission_burst INTEGER, -- NULL: SUBMISSION_RATE_BURST
+    submission_rate_per_minute REAL, -- NULL: SUBMISSION_RATE_PER_MINUTE
+    reuse_verdicts BOOLEAN NOT NULL DEFAULT FALSE
+);
+
+-- Create contest_problems table: one row per problem of a contest, used for
+-- problem to contest lookups (contests.problems keeps the display order)
+CREATE TABLE IF NOT EXISTS contest_problems (
+    contest_id INTEGER NOT NULL REFERENCES contests(id) ON DELETE CASCADE,
+    problem_id VARCHAR(50) NOT NULL,
+    ordinal INTEGER NOT NULL,
+    PRIMARY KEY (contest_id, problem_id)
 );
 
 -- Create contest_participants table
@@ -68,12 +96,126 @@ CREATE TABLE IF NOT EXISTS contest_submissions (
     created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
 );
 
+-- Create judge_dispatch_queue table: outbox of submissions waiting for the judge
+CREATE TABLE IF NOT EXISTS judge_dispatch_queue (
+    id SERIAL PRIMARY KEY,
+    submission_id INTEGER UNIQUE REFERENCES submissions(id) ON DELETE CASCADE,
+    problem_id VARCHAR(50) NOT NULL,
+    language VARCHAR(50) NOT NULL,
+    file_name VARCHAR(255) NOT NULL,
+    source BYTEA NOT NULL,
+    lane VARCHAR(20) NOT NULL DEFAULT 'practice', -- 'contest' or 'practice'
+    attempts INTEGER NOT NULL DEFAULT 0,
+    last_error TEXT,
+    next_attempt_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    created_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP
+);
+
+-- Create rate_limit_buckets table: submission token buckets shared by all
+-- backend processes, keyed by "<user_id>:<contest_id or practice>"
+CREATE TABLE IF NOT EXISTS rate_limit_buckets (
+    key VARCHAR(100) PRIMARY KEY,
+    tokens DOUBLE PRECISION NOT NULL,
+    updated_at TIMESTAMPTZ NOT NULL
+);
+
+-- Create contest_standings table: incrementally maintained leaderboard rows
+CREATE TABLE IF NOT EXISTS contest_standings (
+    contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    problems_solved INTEGER NOT NULL DEFAULT 0,
+    total_score INTEGER NOT NULL DEFAULT 0,
+    total_penalty INTEGER NOT NULL DEFAULT 0,
+    first_solve_time TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (contest_id, user_id)
+);
+
+-- Create contest_standing_cells table: per user x problem leaderboard cells
+CREATE TABLE IF NOT EXISTS contest_standing_cells (
+    contest_id INTEGER REFERENCES contests(id) ON DELETE CASCADE,
+    user_id INTEGER REFERENCES users(id) ON DELETE CASCADE,
+    problem_id VARCHAR(50) NOT NULL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    penalty_attempts INTEGER NOT NULL DEFAULT 0,
+    score INTEGER NOT NULL DEFAULT 0,
+    first_accepted_time TIMESTAMPTZ,
+    updated_at TIMESTAMPTZ DEFAULT CURRENT_TIMESTAMP,
+    PRIMARY KEY (contest_id, user_id, problem_id)
+);
+
+-- Bumped whenever a contest's leaderboard or listing changes; used for ETags
+ALTER TABLE contests ADD COLUMN IF NOT EXISTS version BIGINT NOT NULL DEFAULT 1;
+
+-- Verdict summary columns of submissions (execution_time and memory_used
+-- keep the values the judge callback sends with the verdict)
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS tests_passed INTEGER;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS tests_failed INTEGER;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS verdict VARCHAR(100);
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS judge_node VARCHAR(255);
+ALTER TABLE judge_dispatch_queue ADD COLUMN IF NOT EXISTS lane VARCHAR(20) NOT NULL DEFAULT 'practice';
+ALTER TABLE contests ADD COLUMN IF NOT EXISTS submission_burst INTEGER;
+ALTER TABLE contests ADD COLUMN IF NOT EXISTS submission_rate_per_minute REAL;
+ALTER TABLE contests ADD COLUMN IF NOT EXISTS reuse_verdicts BOOLEAN NOT NULL DEFAULT FALSE;
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS source_hash VARCHAR(64);
+ALTER TABLE submissions ADD COLUMN IF NOT EXISTS problem_version VARCHAR(64);
+
+-- Move judge responses stored inline in submissions to submission_details,
+-- filling in the summary columns
+INSERT INTO submission_details (submission_id, judge_response)
+SELECT id, judge_response FROM submissions
+WHERE judge_response IS NOT NULL
+ON CONFLICT (submission_id) DO NOTHING;
+
+UPDATE submissions s
+SET tests_passed = (s.judge_response->'summary'->>'passed')::int,
+    tests_failed = (s.judge_response->'summary'->>'failed')::int,
+    verdict = (
+        SELECT CASE
+            WHEN bool_and(r->>'verdict' IS NOT DISTINCT FROM 'Accepted') THEN 'Accepted'
+            ELSE (array_agg(r->>'verdict' ORDER BY n)
+                  FILTER (WHERE r->>'verdict' IS DISTINCT FROM 'Accepted'))[1]
+        END
+        FROM jsonb_array_elements(
+            CASE WHEN jsonb_typeof(s.judge_response->'results') = 'array'
+                 THEN s.judge_response->'results' ELSE '[]'::jsonb END
+        ) WITH ORDINALITY AS x(r, n)
+    ),
+    judge_response = NULL
+WHERE s.judge_response IS NOT NULL;
+
+-- Backfill contest_problems from the contests.problems arrays
+INSERT INTO contest_problems (contest_id, problem_id, ordinal)
+SELECT c.id, p.problem_id, p.ordinal
+FROM contests c
+CROSS JOIN LATERAL jsonb_array_elements_text(c.problems) WITH ORDINALITY AS p(problem_id, ordinal)
+WHERE jsonb_typeof(c.problems) = 'array'
+ON CONFLICT (contest_id, problem_id) DO NOTHING;
+
+-- Keep one row per contest and submission, the latest verdict, before
+-- enforcing it below
+DELETE FROM contest_submissions a
+USING contest_submissions b
+WHERE a.contest_id = b.contest_id
+AND a.submission_id = b.submission_id
+AND a.id < b.id;
+
 -- Create indexes for performance
-CREATE INDEX IF NOT EXISTS idx_submissions_user_id ON submissions(user_id);
+-- Serves the per-user submission listing, newest first (keyset on time, id)
+CREATE INDEX IF NOT EXISTS idx_submissions_user_time ON submissions(user_id, submission_time DESC, id DESC);
+DROP INDEX IF EXISTS idx_submissions_user_id;
 CREATE INDEX IF NOT EXISTS idx_submissions_problem_id ON submissions(problem_id);
 CREATE INDEX IF NOT EXISTS idx_submissions_time ON submissions(submission_time);
 CREATE INDEX IF NOT EXISTS idx_contest_submissions_contest_user ON contest_submissions(contest_id, user_id);
 CREATE INDEX IF NOT EXISTS idx_contest_submissions_contest_problem ON contest_submissions(contest_id, problem_id);
 CREATE INDEX IF NOT EXISTS idx_contest_submissions_time ON contest_submissions(submission_time);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_contest_submissions_contest_submission ON contest_submissions(contest_id, submission_id);
 CREATE INDEX IF NOT EXISTS idx_contest_participants_contest ON contest_participants(contest_id);
 CREATE INDEX IF NOT EXISTS idx_contest_participants_user ON contest_participants(user_id);
+CREATE INDEX IF NOT EXISTS idx_contest_standings_rank ON contest_standings(contest_id, problems_solved DESC, total_penalty, first_solve_time);
+CREATE INDEX IF NOT EXISTS idx_contest_problems_problem ON contest_problems(problem_id, contest_id);
+CREATE INDEX IF NOT EXISTS idx_contests_created ON contests(created_at DESC, id DESC);
+CREATE INDEX IF NOT EXISTS idx_judge_dispatch_queue_lane_due ON judge_dispatch_queue(lane, next_attempt_at, id);
+DROP INDEX IF EXISTS idx_judge_dispatch_queue_due;
+CREATE INDEX IF NOT EXISTS idx_submissions_source_hash ON submissions(source_hash, problem_id, language) WHERE source_hash IS NOT NULL;
+CREATE INDEX IF NOT EXISTS idx_submissions_in_progress ON submissions(id) WHERE status IN ('pending', 'queued', 'processing');
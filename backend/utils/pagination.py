@@ -0,0 +1,24 @@
+"""
+Opaque cursors for keyset pagination on (timestamp, id)
+"""
+
+import base64
+from datetime import datetime
+
+
+def encode_cursor(timestamp, row_id):
+    """Opaque keyset pagination cursor for a listing position"""
+    return base64.urlsafe_b64encode(
+        f"{timestamp.isoformat()}|{row_id}".encode()
+    ).decode()
+
+
+def decode_cursor(cursor):
+    """(timestamp, id) of a cursor from encode_cursor; raises ValueError"""
+    try:
+        timestamp, row_id = (
+            base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        )
+        return datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,55 @@
+"""
+Timezone resolution and cached timestamp rendering for API responses
+"""
+
+from datetime import timezone
+from functools import lru_cache
+import pytz
+from config import TIME_FORMAT_CACHE_SIZE
+
+
+@lru_cache(maxsize=256)
+def get_zone(timezone_name):
+    """Resolve a timezone name, falling back to UTC for unknown names"""
+    try:
+        return pytz.timezone(timezone_name)
+    except pytz.exceptions.UnknownTimeZoneError:
+        return pytz.timezone("UTC")
+
+
+@lru_cache(maxsize=TIME_FORMAT_CACHE_SIZE)
+def _format_local_time(utc_time, timezone_name):
+    zone = get_zone(timezone_name)
+    local_time = utc_time.astimezone(zone)
+
+    # Format with timezone abbreviation
+    return (
+        ("iso", local_time.isoformat()),
+        ("formatted", local_time.strftime("%Y-%m-%d %H:%M:%S")),
+        ("timezone", local_time.strftime("%Z")),
+        ("timezone_name", str(zone)),
+        ("utc_iso", utc_time.isoformat()),  # Keep UTC for status calculations
+    )
+
+
+def to_local_time(utc_time, timezone_name="UTC", compact=False):
+    """
+    Render a timestamp for API responses
+
+    Returns a dict with the time in `timezone_name` and in UTC, or only the
+    epoch milliseconds when `compact` is set. Naive timestamps are taken as
+    UTC. Renderings are memoized per (timestamp, zone), as contest times
+    repeat across rows and requests.
+    """
+    if utc_time is None:
+        return None
+
+    # Ensure the time is timezone-aware (UTC)
+    if utc_time.tzinfo is None:
+        utc_time = utc_time.replace(tzinfo=timezone.utc)
+    else:
+        utc_time = utc_time.astimezone(timezone.utc)
+
+    if compact:
+        return int(utc_time.timestamp() * 1000)
+    return dict(_format_local_time(utc_time, timezone_name))
@@ -0,0 +1,26 @@
+import { authService } from './auth';
+import { API_BASE_URL } from '../config';
+
+const API_BASE = API_BASE_URL;
+const PAGE_SIZE = 100;
+
+// Fetch every page of /submission/all matching the given filters
+export async function fetchAllSubmissions(filters: Record<string, string> = {}): Promise<any[]> {
+  const submissions: any[] = [];
+  let cursor: string | null = null;
+  do {
+    const params = new URLSearchParams({ ...filters, limit: String(PAGE_SIZE) });
+    if (cursor) {
+      params.set('cursor', cursor);
+    }
+    const response = await authService.authenticatedRequest(
+      `${API_BASE}/submission/all?${params}`
+    );
+    if (!response.ok) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+    submissions.push(...((await response.json()) || []));
+    cursor = response.headers.get('X-Next-Cursor');
+  } while (cursor);
+  return submissions;
+}